@@ -7,6 +7,8 @@ from typing import Optional, Dict, Any, List
 from datetime import datetime
 from pathlib import Path
 
+from utils import json_dumps
+
 class CheckpointManager:
     """
     Manage crawl checkpoints for resume capability.
@@ -52,7 +54,7 @@ class CheckpointManager:
 
             # Save to file
             with open(checkpoint_file, 'w') as f:
-                json.dump(state, f, indent=2, default=str)
+                f.write(json_dumps(state, indent=True))
 
             self.logger.info(f"Checkpoint saved: {checkpoint_file}")
             return True
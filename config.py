@@ -85,6 +85,8 @@ class CrawlerConfig:
     export_dir: str = os.getenv("EXPORT_DIR", "output")
     save_screenshots: bool = os.getenv("SAVE_SCREENSHOTS", "true").lower() == "true"
     save_html: bool = os.getenv("SAVE_HTML", "true").lower() == "true"
+    # Write each page's HTML/screenshot under export_dir/pages instead of keeping it in memory
+    spill_results: bool = os.getenv("SPILL_RESULTS", "false").lower() == "true"
 
     # Elasticsearch
     elasticsearch_enabled: bool = os.getenv("ELASTICSEARCH_ENABLED", "false").lower() == "true"
@@ -3,9 +3,17 @@ ContentExtractor for God Mode Recon Crawler.
 Extracts textual and structural content, meta, headings, forms, scripts, links, and more from a Playwright async page.
 """
 
+import asyncio
+from concurrent.futures.process import BrokenProcessPool
 from typing import Dict, Any, List, Tuple
 from datetime import datetime
 
+try:
+    from selectolax.lexbor import LexborHTMLParser
+    HAS_SELECTOLAX = True
+except ImportError:
+    HAS_SELECTOLAX = False
+
 try:
     from bs4 import BeautifulSoup
     HAS_BS4 = True
@@ -28,63 +36,128 @@ class Content:
         self.links = []
         self.tables = []
 
+def parse_html(html: str) -> Content:
+    """Parse the structural parts of a page. Module-level so it can run in a process pool."""
+    if HAS_SELECTOLAX:
+        return _parse_html_selectolax(html)
+    if HAS_BS4:
+        return _parse_html_bs4(html)
+    return Content()
+
+def _parse_html_selectolax(html: str) -> Content:
+    """selectolax (lexbor, C) implementation of parse_html."""
+    content = Content()
+    tree = LexborHTMLParser(html)
+    # Meta tags
+    for meta in tree.css('meta'):
+        attrs = meta.attributes
+        name = attrs.get('name') or attrs.get('property')
+        if name:
+            content.meta_tags[name] = attrs.get('content') or ''
+    meta_desc = tree.css_first('meta[name="description"]')
+    if meta_desc:
+        content.description = meta_desc.attributes.get('content') or ''
+    meta_kw = tree.css_first('meta[name="keywords"]')
+    if meta_kw:
+        content.keywords = [k.strip() for k in (meta_kw.attributes.get('content') or '').split(',')]
+    # Headings
+    for tag in ('h1','h2','h3'):
+        content.headings[tag] = [h.text(strip=True) for h in tree.css(tag)][:5]
+    # Inputs and forms
+    for f in tree.css('form'):
+        fields = [i.attributes.get('name') for i in f.css('input') if i.attributes.get('name')]
+        content.forms.append({'action': f.attributes.get('action'), 'fields': fields})
+    # Buttons
+    content.buttons = [{'text': b.text(strip=True)} for b in tree.css('button')]
+    # Inputs
+    content.inputs = [{'name': i.attributes.get('name'), 'type': i.attributes.get('type') or 'text'} for i in tree.css('input')]
+    # Scripts
+    content.scripts = [s.attributes.get('src') for s in tree.css('script') if s.attributes.get('src')]
+    # Paragraphs
+    content.paragraphs = [p.text(strip=True) for p in tree.css('p')]
+    # Tables
+    for table in tree.css('table')[:3]:
+        rows = []
+        for tr in table.css('tr'):
+            cells = [td.text(strip=True) for td in tr.css('td, th')]
+            rows.append(cells)
+        content.tables.append({'rows': rows})
+    return content
+
+def _parse_html_bs4(html: str) -> Content:
+    """BeautifulSoup fallback for parse_html when selectolax is not installed."""
+    content = Content()
+    soup = BeautifulSoup(html, 'html.parser')
+    # Meta tags
+    for meta in soup.find_all('meta'):
+        name = meta.get('name') or meta.get('property')
+        if name:
+            content.meta_tags[name] = meta.get('content', '')
+    meta_desc = soup.find('meta', attrs={'name':'description'})
+    if meta_desc:
+        content.description = meta_desc.get('content','')
+    meta_kw = soup.find('meta', attrs={'name':'keywords'})
+    if meta_kw:
+        content.keywords = [k.strip() for k in meta_kw.get('content','').split(',')]
+    # Headings
+    for tag in ('h1','h2','h3'):
+        content.headings[tag] = [h.get_text(strip=True) for h in soup.find_all(tag)][:5]
+    # Inputs and forms
+    for f in soup.find_all('form'):
+        fields = [i.get('name') for i in f.find_all('input') if i.get('name')]
+        content.forms.append({'action': f.get('action'), 'fields': fields})
+    # Buttons
+    content.buttons = [{'text': b.get_text(strip=True)} for b in soup.find_all('button')]
+    # Inputs
+    content.inputs = [{'name': i.get('name'), 'type': i.get('type','text')} for i in soup.find_all('input')]
+    # Scripts
+    content.scripts = [s.get('src') for s in soup.find_all('script') if s.get('src')]
+    # Paragraphs
+    content.paragraphs = [p.get_text(strip=True) for p in soup.find_all('p')]
+    # Tables
+    for table in soup.find_all('table')[:3]:
+        rows = []
+        for tr in table.find_all('tr'):
+            cells = [td.get_text(strip=True) for td in tr.find_all(['td','th'])]
+            rows.append(cells)
+        content.tables.append({'rows': rows})
+    return content
+
 class ContentExtractor:
-    def __init__(self, logger=None):
+    def __init__(self, logger=None, executor=None):
         self.logger = logger
+        # Optional concurrent.futures executor for the CPU-bound HTML parsing
+        self.executor = executor
 
-    async def extract_content(self, page, url) -> Content:
-        content = Content()
+    async def extract_content(self, page, url, html=None) -> Content:
         try:
             text = await page.evaluate('() => document.body.innerText')
-            html = await page.content()
+            if html is None:
+                html = await page.content()
+            loop = asyncio.get_running_loop()
+            try:
+                content = await loop.run_in_executor(self.executor, parse_html, html)
+            except BrokenProcessPool:
+                # A dead worker poisons the pool for good; parse in threads from now on
+                if self.logger:
+                    self.logger.warning("Content parser pool broke; falling back to in-process parsing")
+                self.executor = None
+                content = await loop.run_in_executor(None, parse_html, html)
             content.title = await page.title()
             content.text = text[:5000]
             content.links = await page.evaluate("() => Array.from(document.querySelectorAll('a[href]')).map(a => a.href)")
-            if HAS_BS4:
-                soup = BeautifulSoup(html, 'html.parser')
-                # Meta tags
-                for meta in soup.find_all('meta'):
-                    name = meta.get('name') or meta.get('property')
-                    if name:
-                        content.meta_tags[name] = meta.get('content', '')
-                meta_desc = soup.find('meta', attrs={'name':'description'})
-                if meta_desc:
-                    content.description = meta_desc.get('content','')
-                meta_kw = soup.find('meta', attrs={'name':'keywords'})
-                if meta_kw:
-                    content.keywords = [k.strip() for k in meta_kw.get('content','').split(',')]
-                # Headings
-                for tag in ('h1','h2','h3'):
-                    content.headings[tag] = [h.get_text(strip=True) for h in soup.find_all(tag)][:5]
-                # Inputs and forms
-                for f in soup.find_all('form'):
-                    fields = [i.get('name') for i in f.find_all('input') if i.get('name')]
-                    content.forms.append({'action': f.get('action'), 'fields': fields})
-                # Buttons
-                content.buttons = [{'text': b.get_text(strip=True)} for b in soup.find_all('button')]
-                # Inputs
-                content.inputs = [{'name': i.get('name'), 'type': i.get('type','text')} for i in soup.find_all('input')]
-                # Scripts
-                content.scripts = [s.get('src') for s in soup.find_all('script') if s.get('src')]
-                # Paragraphs
-                content.paragraphs = [p.get_text(strip=True) for p in soup.find_all('p')]
-                # Tables
-                for table in soup.find_all('table')[:3]:
-                    rows = []
-                    for tr in table.find_all('tr'):
-                        cells = [td.get_text(strip=True) for td in tr.find_all(['td','th'])]
-                        rows.append(cells)
-                    content.tables.append({'rows': rows})
             return content
         except Exception as e:
             if self.logger:
                 self.logger.error(f"Content extraction error: {e}")
+            content = Content()
             content.text = "ERROR"
             return content
 
     async def extract_links(self, page, url, scope_manager):
         """Return (in_scope_links, out_of_scope_links) using scope_manager."""
-        in_scope = []
+        # Dicts as insertion-ordered sets: O(1) dedup instead of list scans
+        in_scope = {}
         out_scope = []
         try:
             links = await page.evaluate("""
@@ -95,12 +168,11 @@ class ContentExtractor:
             for link in set(links):
                 normalized = scope_manager.normalize_url(link, url)
                 if normalized:
-                    if normalized not in in_scope:
-                        in_scope.append(normalized)
+                    in_scope[normalized] = None
                 else:
-                    if link not in out_scope:
-                        out_scope.append(link)
-            return in_scope, out_scope
+                    # Already unique: links were deduplicated by set() above
+                    out_scope.append(link)
+            return list(in_scope), out_scope
         except Exception as e:
             if self.logger:
                 self.logger.error(f"Link extraction error: {e}")
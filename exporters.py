@@ -8,6 +8,8 @@ from pathlib import Path
 from datetime import datetime
 import xml.etree.ElementTree as ET
 
+from utils import json_dumps
+
 logger = logging.getLogger(__name__)
 
 def export_results(results: List[Any], output_path: str, format: str = 'json') -> bool:
@@ -54,14 +56,14 @@ def export_json(results: List[Any], output_path: str) -> bool:
                 data.append(result)
 
         with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump({
+            f.write(json_dumps({
                 'metadata': {
                     'exported_at': datetime.utcnow().isoformat(),
                     'total_results': len(data),
                     'format': 'json'
                 },
                 'results': data
-            }, f, indent=2, default=str)
+            }, indent=True))
 
         logger.info(f"Exported {len(data)} results to JSON: {output_path}")
         return True
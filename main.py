@@ -13,6 +13,9 @@ import signal
 import time
 import random
 import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from collections import OrderedDict
 from datetime import datetime
 from pathlib import Path
 from typing import List, Dict, Any
@@ -34,11 +37,15 @@ from exporters import Exporters
 from dashboard import DashboardManager
 from stealth_crawler import StealthCrawler
 from metrics import CrawlerMetrics
-from utils import normalize_url, get_domain
+from utils import normalize_url, get_domain, json_dumps, append_jsonl
 from scope_manager import ScopeManager
 
 AdvancedScopeManager = ScopeManager
 
+# Per-host token buckets kept at once; the least recently used host is dropped
+# (an idle host's bucket is full anyway, so recreating it loses nothing)
+RATE_LIMITER_CACHE_SIZE = 1024
+
 load_dotenv()
 try:
     import keyring
@@ -107,8 +114,9 @@ def parse_arguments() -> argparse.Namespace:
     crawl_parser.add_argument('--output', '-o', help='Output file path')
     crawl_parser.add_argument('--export', choices=['json', 'csv', 'xml', 'html'], default='json', help='Export format')
     crawl_parser.add_argument('--flush-every', type=int, default=20, help='Write results to disk every N pages')
+    crawl_parser.add_argument('--checkpoint-every', type=int, default=50, help='Save a checkpoint every N processed URLs')
     crawl_parser.add_argument('--cache-dir', default='.urlcache', help='Directory for disk-based URL cache')
-    crawl_parser.add_argument('--rate-limit', type=int, default=5, help='Global requests per second limit')
+    crawl_parser.add_argument('--rate-limit', type=int, default=5, help='Requests per second limit per host')
     crawl_parser.add_argument('--timeout', type=int, default=30, help='Default page timeout in seconds')
     crawl_parser.add_argument('--retries', type=int, default=2, help='Retries per failed URL')
     crawl_parser.add_argument('--js-wait-ms', type=int, default=0, help='Extra wait (ms) after networkidle for JS')
@@ -163,47 +171,80 @@ class CrawlState:
         self.visited_urls = set([normalize_url(u) for u in self.url_cache.visited])
         self.url_queue = asyncio.Queue()
         self.results = {}
+        self.pending_results = []
         self.result_lock = asyncio.Lock()
         self.flush_count = 0
         self.output_dir = Path("crawl_results")
         self.output_dir.mkdir(exist_ok=True)
+        self.partial_path = self.output_dir / "results_partial.ndjson"
         self.scope_manager = ScopeManager()
         # Checkpointing integration
         self.checkpoint_manager = CheckpointManager("checkpoints", logger)
         self.checkpoint_id = None
+        self.urls_since_checkpoint = 0
+        self.checkpoint_task = None
         # Metrics collection
         self.metrics = CrawlerMetrics(logger)
 
     async def enqueue(self, url):
         url = normalize_url(url)
-        print(f"ENQUEUE CHECK: url={url} | in visited? {url in self.visited_urls} | in cache? {url in self.url_cache}")
-        if url not in self.visited_urls and url not in self.url_cache:
-            print(f"ENQUEUE: Actually adding url={url}")
-            self.visited_urls.add(url)
-            self.url_cache.add(url)
-            await self.url_queue.put(url)
-            print(f"QUEUE SIZE INSIDE ENQUEUE: {self.url_queue.qsize()}")
-        else:
-            print(f"ENQUEUE: Skipping url={url}")         
+        # A single set.add claims the URL; if the size didn't change it was already seen
+        seen = len(self.visited_urls)
+        self.visited_urls.add(url)
+        if len(self.visited_urls) == seen or url in self.url_cache:
+            return
+        self.logger.debug(f"Enqueued {url}")
+        self.url_cache.add(url)
+        await self.url_queue.put(url)
     async def flush_results(self, final=False):
         async with self.result_lock:
-            mode = "final" if final else f"partial_{self.flush_count}"
-            fname = self.output_dir / f"results_{mode}.{self.args.export}"
-            Exporters.write(self.results, fname, mode=self.args.export)
+            if final:
+                # Only the final flush pays for a full export in the requested format
+                fname = self.output_dir / f"results_final.{self.args.export}"
+                Exporters.write(self.results, fname, mode=self.args.export)
+                self.pending_results.clear()
+            else:
+                # Partial flushes append just the results gathered since the last flush
+                if not self.pending_results:
+                    return
+                fname = self.partial_path
+                # Swap the buffer out first: crawl tasks keep appending while we await the write
+                batch, self.pending_results = self.pending_results, []
+                await append_jsonl(fname, batch)
             self.flush_count += 1
             self.logger.info(f"💾 Results flushed to disk: {fname}")
+    def restore(self, checkpoint):
+        """Restore visited URLs, pending queue and results from a checkpoint snapshot."""
+        self.visited_urls = set(checkpoint.get("visited_urls", []))
+        self.results = dict(checkpoint.get("results", {}))
+        for url in checkpoint.get("queue", []):
+            # Already claimed in visited_urls/url_cache by the original run, so bypass enqueue()
+            self.url_queue.put_nowait(url)
+    async def reset_partial_results(self):
+        """Start this run's partial NDJSON afresh (seeded with any resumed results)."""
+        async with self.result_lock:
+            # Partial flushes only ever append, so an earlier run's records must go first
+            self.partial_path.write_bytes(b"")
+            if self.results:
+                await append_jsonl(self.partial_path, list(self.results.values()))
     async def periodic_flush(self):
         while True:
             await asyncio.sleep(20)
             await self.flush_results(final=False)
-    def save_checkpoint(self):
-        checkpoint = {
+    def _checkpoint_snapshot(self):
+        # Shallow copies taken on the event loop so the writer thread never sees them mutate
+        return {
             "visited_urls": list(self.visited_urls),
-            "queue": [self.url_queue._queue[x] for x in range(self.url_queue.qsize())],
-            "results": self.results,
+            "queue": list(self.url_queue._queue),
+            "results": dict(self.results),
             "checkpoint_id": self.checkpoint_id
         }
-        self.checkpoint_manager.save(self.checkpoint_id or "latest", checkpoint)
+    def save_checkpoint(self):
+        self.checkpoint_manager.save(self.checkpoint_id or "latest", self._checkpoint_snapshot())
+    async def save_checkpoint_async(self):
+        """Snapshot state on the loop, then serialize and write it in a worker thread."""
+        checkpoint = self._checkpoint_snapshot()
+        await asyncio.to_thread(self.checkpoint_manager.save, self.checkpoint_id or "latest", checkpoint)
 
 class ReconOrchestrator:
     def __init__(self, args, logger):
@@ -215,26 +256,58 @@ class ReconOrchestrator:
         for pattern in getattr(args, "out_scope", []):  # Note: arg is called "out-scope" in CLI, so "out_scope" in code
             self.state.scope_manager.add_out_of_scope(pattern)
         self.concurrency = args.concurrency
-        self.rate_limiter = TokenBucketLimiter(args.rate_limit, 1)
-        self.proxy_manager = ProxyManager(args.proxy_file, logger) if args.proxy else None
+        self.rate_limiters: "OrderedDict[str, TokenBucketLimiter]" = OrderedDict()
+        self.proxy_manager = ProxyManager(args.proxy_file) if args.proxy else None
         self.captcha = CaptchaHandler(args.captcha_type, args.captcha_api_key, logger) if args.captcha else None
-        self.vision = VisionAnalyzer(args.vision_provider, args.vision_api_key, logger) if args.vision else None
-        self.webhooks = WebhookNotifier(args.slack_url, args.discord_url, args.teams_url, logger) if args.webhooks else None
+        self.vision = VisionAnalyzer(args.vision_provider, args.vision_api_key) if args.vision else None
+        self.webhooks = WebhookNotifier(args.slack_url, args.discord_url, args.teams_url) if args.webhooks else None
         self.tor = TorSupport() if args.tor else None
 ##        self.stealth = StealthCrawler(self.logger)
         self.stealth = StealthCrawler(self.args, self.logger)
         self.patternlib = PatternLibrary()
-        self.protocol_detector = ProtocolDetector()
+        # HTML parsing and protocol detection are CPU-bound; keep them off the event loop
+        # forkserver/spawn: forking this process would copy Playwright's threads and loop state
+        start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        self.cpu_pool = ProcessPoolExecutor(
+            max_workers=os.cpu_count(),
+            mp_context=multiprocessing.get_context(start_method)
+        )
+        self.protocol_detector = ProtocolDetector(self.cpu_pool)
         self.auth_manager = AuthenticationManager(logger)
+        # Resolved once per crawl: keyring lookups and form_fields parsing are not free
+        self.auth_config = (
+            self._make_auth_config()
+            if getattr(args, "auth_type", None) or getattr(args, "login_url", None) else None
+        )
         self.exporters = Exporters()
         self.dashboard = DashboardManager(logger) if args.dashboard else None
-        self.content_extractor = ContentExtractor(logger)
+        self.content_extractor = ContentExtractor(logger, self.cpu_pool)
         # Live metrics
         self.metrics = self.state.metrics
 
     async def crawl_main(self):
+        try:
+            await self._crawl_main()
+        finally:
+            # Also on errors/cancellation, so no parser processes outlive the crawl
+            self.cpu_pool.shutdown(wait=False, cancel_futures=True)
+            await self._close_clients()
+
+    async def _close_clients(self):
+        """Flush buffered webhook errors and close the shared HTTP/SDK clients."""
+        for name in ("webhooks", "vision", "proxy_manager"):
+            client = getattr(self, name, None)
+            if client is None:
+                continue
+            try:
+                await client.close()
+            except Exception as e:
+                self.logger.warning(f"Closing {name} failed: {e}")
+
+    async def _crawl_main(self):
 
         self.state.checkpoint_id = f"{int(time.time())}_{random.randint(1000,9999)}"
+        await self.state.reset_partial_results()
 
         # 1. Enqueue all normalized, in-scope start URLs
         for url in self.args.urls:
@@ -290,6 +363,9 @@ class ReconOrchestrator:
         if dashboard_task:
             dashboard_task.cancel()
         await self.state.flush_results(final=True)
+        if self.state.checkpoint_task:
+            await self.state.checkpoint_task
+        await self.state.save_checkpoint_async()
         self.metrics.log_summary()
 
         # 8. Notify webhooks of completion
@@ -304,10 +380,10 @@ class ReconOrchestrator:
         # 9. Output summary file for traceability
         summary_path = self.state.output_dir / "summary.json"
         with open(summary_path, "w") as sf:
-            json.dump({
+            sf.write(json_dumps({
                 "total_urls": len(self.state.results),
                 "timestamp": datetime.now().isoformat()
-            }, sf, indent=2)
+            }, indent=True))
         self.logger.info(f"🎉 Crawl completed. All results saved. (Summary: {summary_path})")
     
     async def worker(self, worker_id):
@@ -321,7 +397,12 @@ class ReconOrchestrator:
             try:
                 await self.process_url_with_retries(url, worker_id)
                 if worker_id == 0:  # Only 1 worker triggers checkpoint
-                    self.state.save_checkpoint()
+                    self.state.urls_since_checkpoint += 1
+                    pending = self.state.checkpoint_task
+                    if (self.state.urls_since_checkpoint >= getattr(self.args, "checkpoint_every", 50)
+                            and (pending is None or pending.done())):
+                        self.state.urls_since_checkpoint = 0
+                        self.state.checkpoint_task = asyncio.create_task(self.state.save_checkpoint_async())
             finally:
                 self.state.url_queue.task_done()
 
@@ -329,25 +410,48 @@ class ReconOrchestrator:
         backoff = 2.0
         for attempt in range(self.args.retries + 1):
             try:
-                await self.rate_limiter.acquire()
+                await self._rate_limiter_for(url).acquire()
                 await self.handle_crawl(url, worker_id)
                 break
             except Exception as e:
                 self.logger.warning(f"[{worker_id}] {url} attempt {attempt+1}: {e}")
                 self.metrics.record_error(type(e).__name__)
                 if attempt < self.args.retries:
-                    await asyncio.sleep(backoff)
+                    await asyncio.sleep(backoff + random.uniform(0, 0.25 * backoff))
                     backoff *= 2
         else:
             async with self.state.result_lock:
                 self.state.results[url] = {"url": url, "error": "Failed after retries"}
+                self.state.pending_results.append(self.state.results[url])
                 self.metrics.record_error("RetriesFailed")
                 self.logger.error(f"[{worker_id}] {url} failed after {self.args.retries} retries.")
 
+    async def _wait_for_growth(self, page, previous_height: int, timeout: int = 1500) -> bool:
+        """Wait until the page grows past previous_height; False if nothing new loaded in time."""
+        try:
+            await page.wait_for_function(
+                "h => document.body.scrollHeight !== h", arg=previous_height, timeout=timeout
+            )
+            return True
+        except Exception:
+            return False
+
+    def _rate_limiter_for(self, url: str) -> TokenBucketLimiter:
+        # One bucket per host so a slow domain doesn't starve the others
+        host = get_domain(url) or ""
+        limiter = self.rate_limiters.get(host)
+        if limiter is None:
+            limiter = self.rate_limiters[host] = TokenBucketLimiter(self.args.rate_limit, 1)
+            if len(self.rate_limiters) > RATE_LIMITER_CACHE_SIZE:
+                self.rate_limiters.popitem(last=False)
+        else:
+            self.rate_limiters.move_to_end(host)
+        return limiter
+
     async def handle_crawl(self, url: str, worker_id: int):
         self.logger.info(f"[{worker_id}] Browsing (pw): {url}")
-        #scope_manager = AdvancedScopeManager(url, self.args.in_scope, self.args.out_scope, self.logger)
-        scope_manager = AdvancedScopeManager(self.args.in_scope, self.args.out_scope, self.logger)
+        # Scope rules are fixed for the whole crawl; reuse the manager built in __init__
+        scope_manager = self.state.scope_manager
         auth_success = False
         if not HAS_PLAYWRIGHT:
             raise RuntimeError("Playwright not installed. Install with `pip install playwright`.")
@@ -362,7 +466,7 @@ class ReconOrchestrator:
             page = await context.new_page()
             # Auth
             if self.args.auth_type or self.args.login_url:
-                auth_success = await self.auth_manager.authenticate(page, self._make_auth_config())
+                auth_success = await self.auth_manager.authenticate(page, self.auth_config)
                 if auth_success:
                     self.auth_manager.apply_auth_to_page(page)
             # API/network interceptor/Pattern detection
@@ -381,24 +485,28 @@ class ReconOrchestrator:
                 await asyncio.sleep(self.args.js_wait_ms / 1000.0)
             if self.args.scroll:
                 for _ in range(self.args.scroll_times):
+                    height = await page.evaluate("document.body.scrollHeight")
                     await page.evaluate("window.scrollTo(0, document.body.scrollHeight);")
-                    await asyncio.sleep(0.5)
+                    if not await self._wait_for_growth(page, height):
+                        break
             if self.args.click_selector:
                 for _ in range(self.args.scroll_times):
+                    height = await page.evaluate("document.body.scrollHeight")
                     try:
                         await page.click(self.args.click_selector, timeout=3000)
                     except:
-                        pass
-                    await asyncio.sleep(0.5)
-            # Content extraction
-            content = await self.content_extractor.extract_content(page, url)
-            #techs, libs = await self.protocol_detector.detect(page)
+                        break
+                    if not await self._wait_for_growth(page, height):
+                        break
             # Get HTML content (Playwright style)
             html = await page.content()
             url = page.url  # usually a string
             headers = {}    # Fill this with your actual headers if available
-            #####techs, libs = await self.protocol_detector.detect(html, url, headers)
-            protocols = await self.protocol_detector.detect(html, url, headers)
+            # Content extraction and protocol detection parse in the CPU pool concurrently
+            content, protocols = await asyncio.gather(
+                self.content_extractor.extract_content(page, url, html=html),
+                self.protocol_detector.detect(html, url, headers),
+            )
             if api_interceptor is not None:
                 # Only await if method is async
                 if asyncio.iscoroutinefunction(api_interceptor.discover_apis):
@@ -415,11 +523,13 @@ class ReconOrchestrator:
                 network_log = None  # or [] or {} depending on what you expect
             links_in_scope, links_out_scope = await self.content_extractor.extract_links(page, url, scope_manager)
             vision_result = None
-            content_hash = hashlib.sha256((await page.content()).encode()).hexdigest()
+            content_hash = hashlib.sha256(html.encode('utf-8')).hexdigest()
             if self.vision:
-                screenshot_path = str(self.state.output_dir / f"screenshot_{content_hash[:10]}.png")
-                await page.screenshot(path=screenshot_path)
-                vision_result = await self.vision.analyze_screenshot(screenshot_path)
+                screenshot_path = str(self.state.output_dir / f"screenshot_{content_hash[:10]}.jpg")
+                # screenshot() still returns the bytes when it also writes path. Repeat
+                # screenshots (templated pages) are answered from VisionAnalyzer's LRU
+                screenshot = await page.screenshot(path=screenshot_path, type="jpeg", quality=70, full_page=False)
+                vision_result = await self.vision.analyze_screenshot(screenshot)
             net_traffic = []
             techs = []
             libs = []
@@ -428,7 +538,7 @@ class ReconOrchestrator:
                 "title": content.title,
                 "hash": content_hash,
                 "timestamp": datetime.now().isoformat(),
-                "text": content.text[:5000],
+                "text": content.text,  # already capped at 5000 chars by ContentExtractor
                 "meta_tags": content.meta_tags,
                 "keywords": content.keywords,
                 "headings": content.headings,
@@ -450,11 +560,11 @@ class ReconOrchestrator:
                 "error": None,
             }
             for link in links_in_scope:
-                if link not in self.state.visited_urls and link not in self.state.url_cache:
-                    await self.state.enqueue(link)
+                await self.state.enqueue(link)
             async with self.state.result_lock:
                 self.state.results[url] = result
-            self.metrics.record_page(result["load_time"], 200)
+                self.state.pending_results.append(result)
+            self.metrics.record_page(url, result, success=True)
             await context.close()
             await browser.close()
 
@@ -535,12 +645,8 @@ def main():
             print("No test URLs provided.")
     elif args.command == "resume":
         logger.info(f"Resuming from checkpoint {args.checkpoint_id}")
-        checkpoint_file = Path("checkpoints") / f"{args.checkpoint_id}.pkl"
         orchestrator = None
-        if not checkpoint_file.exists():
-            logger.error("Checkpoint file not found!")
-            return
-        # Load as per CheckpointManager
+        # CheckpointManager writes <id>.json and logs if it is missing
         checkpoint_manager = CheckpointManager("checkpoints", logger)
         state_data = checkpoint_manager.load(args.checkpoint_id)
         if not state_data:
@@ -548,9 +654,7 @@ def main():
             return
         args.urls = list(set(state_data.get("queue", [])))
         orchestrator = ReconOrchestrator(args, logger)
-        orchestrator.state.visited_urls = set(state_data.get("visited_urls", []))
-        for url in state_data.get("queue", []):
-            asyncio.get_event_loop().run_until_complete(orchestrator.state.enqueue(url))
+        orchestrator.state.restore(state_data)
         run_with_graceful_shutdown(orchestrator.crawl_main)
         if getattr(args, 'output', None):
             output_path = Path(args.output)
@@ -1,3 +1,6 @@
+from collections import Counter
+
+
 class CrawlerMetrics:
     """
     Tracks run-time metrics for the crawler job.
@@ -9,19 +12,26 @@ class CrawlerMetrics:
         self.success_count = 0
         self.start_time = None
         self.end_time = None
+        self.error_types = Counter()
         self.logger = logger
 
     def record_page(self, url=None, result=None, success=True):
+        # Plain increments: callers run on a single event loop, so no lock is needed
         self.pages_crawled += 1
         if success:
             self.success_count += 1
         else:
             self.error_count += 1
 
+    def record_error(self, error_type="Unknown"):
+        self.error_count += 1
+        self.error_types[error_type] += 1
+
     def reset(self):
         self.pages_crawled = 0
         self.success_count = 0
         self.error_count = 0
+        self.error_types.clear()
         self.start_time = None
         self.end_time = None
 
@@ -29,6 +39,7 @@ class CrawlerMetrics:
         return {
             "pages_crawled": self.pages_crawled,
             "errors": self.error_count,
+            "error_types": dict(self.error_types),
             "success": self.success_count,
             "started": self.start_time,
             "ended": self.end_time,
@@ -1,12 +1,34 @@
 """Self-learning URL pattern library for StealthCrawler v17."""
 
 import re
+from functools import lru_cache
 from typing import Dict, List, Set
-from collections import defaultdict
+from collections import Counter, defaultdict
 import logging
 
 logger = logging.getLogger(__name__)
 
+# One alternation so each URL is scanned once; order gives UUIDs and hashes
+# priority over the digits they contain. The group name is the placeholder.
+# UUIDs/hashes are anchored to hex-run boundaries so the engine never retries
+# them from the middle of a long hex run.
+_RE_DYNAMIC = re.compile(
+    r'(?P<uuid>(?<![0-9a-f])[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}(?![0-9a-f]))'
+    r'|(?P<hash>(?<![0-9a-f])[0-9a-f]{32,}(?![0-9a-f]))'
+    r'|(?P<id>\d+)',
+    re.IGNORECASE
+)
+
+
+def _placeholder(match: re.Match) -> str:
+    return f'{{{match.lastgroup}}}'
+
+
+@lru_cache(maxsize=1 << 16)
+def _extract_pattern_cached(url: str) -> str:
+    # Replace UUIDs, hashes (32+ hex chars) and numbers in a single pass
+    return _RE_DYNAMIC.sub(_placeholder, url)
+
 
 class PatternLibrary:
     """
@@ -18,8 +40,8 @@ class PatternLibrary:
     - Dynamic pattern updates
     """
     
-    def __init__(self):
-        self.patterns: Dict[str, List[str]] = defaultdict(list)
+    def __init__(self) -> None:
+        self.patterns: Dict[str, Counter] = defaultdict(Counter)
         self.url_counts: Dict[str, int] = defaultdict(int)
         self.learned_patterns: Set[str] = set()
         
@@ -32,10 +54,10 @@ class PatternLibrary:
             category: Category for the URL
         """
         self.url_counts[url] += 1
-        self.patterns[category].append(url)
         
-        # Extract pattern
+        # Extract pattern once and count it per category
         pattern = self._extract_pattern(url)
+        self.patterns[category][pattern] += 1
         if pattern:
             self.learned_patterns.add(pattern)
             logger.debug(f"Learned pattern: {pattern}")
@@ -50,21 +72,7 @@ class PatternLibrary:
         Returns:
             Pattern string
         """
-        # Replace numbers with placeholder
-        pattern = re.sub(r'\d+', '{id}', url)
-        
-        # Replace UUIDs
-        pattern = re.sub(
-            r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}',
-            '{uuid}',
-            pattern,
-            flags=re.IGNORECASE
-        )
-        
-        # Replace hashes (32+ hex chars)
-        pattern = re.sub(r'[0-9a-f]{32,}', '{hash}', pattern, flags=re.IGNORECASE)
-        
-        return pattern
+        return _extract_pattern_cached(url)
     
     def matches_pattern(self, url: str, pattern: str) -> bool:
         """
@@ -82,7 +90,7 @@ class PatternLibrary:
     
     def get_patterns(self, category: str = 'default') -> List[str]:
         """Get all learned patterns for a category."""
-        return list(set(self._extract_pattern(url) for url in self.patterns[category]))
+        return list(self.patterns[category])
     
     def get_statistics(self) -> Dict:
         """Get pattern statistics."""
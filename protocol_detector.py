@@ -1,11 +1,48 @@
 """Protocol detection for WebSocket, GraphQL, and SSE for StealthCrawler v17."""
 
 import re
+import asyncio
 import logging
+from concurrent.futures.process import BrokenProcessPool
 from typing import Optional, Dict, Any
 
 logger = logging.getLogger(__name__)
 
+# Head/tail sampling is opt-in: by default the whole document is scanned.
+# Most protocol hints live in <head>, early inline scripts and trailing
+# bundles, so passing max_scan=SAMPLED_MAX_SCAN bounds the work on huge pages,
+# at the cost of missing markers that only appear in the middle.
+DEFAULT_MAX_SCAN: Optional[int] = None
+SAMPLED_MAX_SCAN = 65536
+TAIL_SCAN = 8192
+
+# All patterns are written in lowercase and matched against a lowercased copy
+# of the HTML/URL, so none of them needs re.IGNORECASE case folding.
+
+# WebSocket patterns stay separate and ordered: the first match wins
+_WS_PATTERNS = (
+    re.compile(r'ws[s]?://[^\s\'"]+'),
+    re.compile(r'new\s+websocket\([\'"]([^\'"]+)[\'"]'),
+)
+_GRAPHQL_ENDPOINT = re.compile(r'[\'"]([^\'"]*graphql[^\'"]*)[\'"]')
+
+# Plain-literal indicators are substring checks on the lowercased buffer;
+# only the ones that need \s* or \d+ stay regexes (one fused alternation each).
+_GRAPHQL_LITERALS = ('/graphql', '.graphql', '__typename')
+_GRAPHQL_OPERATION = re.compile(r'(?:query|mutation)\s*{')
+_REST_API_URL_LITERALS = ('/api/', '.json')
+_REST_API_VERSION = re.compile(r'/v\d+/')
+# api[/-]docs? needs no regex: 'api/doc' and 'api-doc' already cover the optional s
+_API_DOC_LITERALS = ('api/doc', 'api-doc', 'swagger', 'openapi')
+
+
+def _capture(match: 're.Match[str]', group: int, html: str, html_lc: str) -> str:
+    """Return a match group from the original-case HTML where spans line up."""
+    # str.lower() keeps offsets unless a character expands (e.g. U+0130); in
+    # that rare case fall back to the lowercased text.
+    source = html if len(html) == len(html_lc) else html_lc
+    return source[match.start(group):match.end(group)]
+
 
 class ProtocolDetector:
     """
@@ -19,63 +56,57 @@ class ProtocolDetector:
     """
     
     @staticmethod
-    def detect_websocket(html: str, url: str) -> Optional[str]:
+    def detect_websocket(html: str, url: str, html_lc: Optional[str] = None) -> Optional[str]:
         """
         Detect WebSocket connections in HTML.
         
         Args:
             html: HTML content
             url: Page URL
+            html_lc: Precomputed html.lower(), if the caller already has it
             
         Returns:
             WebSocket URL if found, None otherwise
         """
-        # Look for WebSocket URL patterns
-        ws_patterns = [
-            r'ws[s]?://[^\s\'"]+',
-            r'new\s+WebSocket\([\'"]([^\'"]+)[\'"]',
-        ]
+        if html_lc is None:
+            html_lc = html.lower()
         
-        for pattern in ws_patterns:
-            match = re.search(pattern, html, re.IGNORECASE)
+        # Look for WebSocket URL patterns
+        for pattern in _WS_PATTERNS:
+            match = pattern.search(html_lc)
             if match:
-                ws_url = match.group(1) if match.lastindex else match.group(0)
+                ws_url = _capture(match, 1 if match.lastindex else 0, html, html_lc)
                 logger.info(f"WebSocket detected: {ws_url}")
                 return ws_url
         
         return None
     
     @staticmethod
-    def detect_graphql(html: str, url: str) -> Optional[Dict[str, Any]]:
+    def detect_graphql(html: str, url: str, html_lc: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """
         Detect GraphQL endpoints.
         
         Args:
             html: HTML content
             url: Page URL
+            html_lc: Precomputed html.lower(), if the caller already has it
             
         Returns:
             Dictionary with GraphQL info if found, None otherwise
         """
-        graphql_indicators = [
-            r'/graphql',
-            r'\.graphql',
-            r'query\s*{',
-            r'mutation\s*{',
-            r'__typename',
-        ]
-        
-        for indicator in graphql_indicators:
-            if re.search(indicator, html, re.IGNORECASE):
-                # Try to find endpoint
-                endpoint_match = re.search(r'[\'"]([^\'"]*graphql[^\'"]*)[\'"]', html, re.IGNORECASE)
-                endpoint = endpoint_match.group(1) if endpoint_match else '/graphql'
-                
-                logger.info(f"GraphQL detected: {endpoint}")
-                return {
-                    'endpoint': endpoint,
-                    'detected': True
-                }
+        if html_lc is None:
+            html_lc = html.lower()
+        
+        if any(lit in html_lc for lit in _GRAPHQL_LITERALS) or _GRAPHQL_OPERATION.search(html_lc):
+            # Try to find endpoint
+            endpoint_match = _GRAPHQL_ENDPOINT.search(html_lc)
+            endpoint = _capture(endpoint_match, 1, html, html_lc) if endpoint_match else '/graphql'
+            
+            logger.info(f"GraphQL detected: {endpoint}")
+            return {
+                'endpoint': endpoint,
+                'detected': True
+            }
         
         return None
     
@@ -99,72 +130,120 @@ class ProtocolDetector:
         return False
     
     @staticmethod
-    def detect_rest_api(url: str, html: str) -> Optional[Dict[str, Any]]:
+    def detect_rest_api(url: str, html: str, html_lc: Optional[str] = None) -> Optional[Dict[str, Any]]:
         """
         Detect REST API patterns.
         
         Args:
             url: Page URL
             html: HTML content
+            html_lc: Precomputed html.lower(), if the caller already has it
             
         Returns:
             Dictionary with API info if found, None otherwise
         """
-        api_patterns = [
-            r'/api/',
-            r'/v\d+/',
-            r'\.json',
-        ]
-        
-        for pattern in api_patterns:
-            if re.search(pattern, url, re.IGNORECASE):
-                logger.info(f"REST API detected in URL: {url}")
-                return {
-                    'type': 'rest',
-                    'url': url,
-                    'detected': True
-                }
+        url_lower = url.lower()
+        if any(lit in url_lower for lit in _REST_API_URL_LITERALS) or _REST_API_VERSION.search(url_lower):
+            logger.info(f"REST API detected in URL: {url}")
+            return {
+                'type': 'rest',
+                'url': url,
+                'detected': True
+            }
         
         # Check for API documentation links
-        api_doc_patterns = [
-            r'api[/-]docs?',
-            r'swagger',
-            r'openapi',
-        ]
-        
-        for pattern in api_doc_patterns:
-            if re.search(pattern, html, re.IGNORECASE):
-                logger.info(f"API documentation detected")
-                return {
-                    'type': 'rest',
-                    'has_documentation': True,
-                    'detected': True
-                }
+        if html_lc is None:
+            html_lc = html.lower()
+        if any(lit in html_lc for lit in _API_DOC_LITERALS):
+            logger.info(f"API documentation detected")
+            return {
+                'type': 'rest',
+                'has_documentation': True,
+                'detected': True
+            }
         
         return None
     
+    def __init__(self, executor=None, max_scan: Optional[int] = DEFAULT_MAX_SCAN):
+        # Optional concurrent.futures executor for running detection off the event loop
+        self.executor = executor
+        # Scan budget for HTML; None scans the whole document
+        self.max_scan = max_scan
+    
+    @staticmethod
+    def sample_html(html: str, max_scan: Optional[int] = DEFAULT_MAX_SCAN) -> str:
+        """
+        Reduce very large HTML to its head and tail windows.
+        
+        Recall trade-off: a WebSocket URL, GraphQL or API-doc marker that only
+        appears between the first max_scan and the last TAIL_SCAN characters
+        is not seen. Sampling is off unless a max_scan is given.
+        
+        Args:
+            html: HTML content
+            max_scan: Head window size; None disables sampling
+            
+        Returns:
+            The HTML itself if small enough, otherwise head + tail windows
+        """
+        if max_scan is None or len(html) <= max_scan + TAIL_SCAN:
+            return html
+        return html[:max_scan] + '\n' + html[-TAIL_SCAN:]
+    
     @classmethod
-    async def detect_all(cls, html: str, url: str, headers: Dict[str, str]) -> Dict[str, Any]:
+    def detect_all_sync(
+        cls,
+        html: str,
+        url: str,
+        headers: Dict[str, str],
+        max_scan: Optional[int] = DEFAULT_MAX_SCAN
+    ) -> Dict[str, Any]:
         """
-        Run all protocol detections.
+        Run all protocol detections synchronously (picklable for process pools).
         
         Args:
             html: HTML content
             url: Page URL
             headers: Response headers
+            max_scan: HTML scan budget (see sample_html); None scans everything
             
         Returns:
             Dictionary with all detected protocols
         """
+        html = cls.sample_html(html, max_scan)
+        # Lowercase once and share the buffer across all detectors
+        html_lc = html.lower()
         return {
-            'websocket': cls.detect_websocket(html, url),
-            'graphql': cls.detect_graphql(html, url),
+            'websocket': cls.detect_websocket(html, url, html_lc),
+            'graphql': cls.detect_graphql(html, url, html_lc),
             'sse': cls.detect_sse(headers),
-            'rest_api': cls.detect_rest_api(url, html),
+            'rest_api': cls.detect_rest_api(url, html, html_lc),
         }
-    def detect(self, html: str, url: str, headers: dict) -> dict:
+    
+    @classmethod
+    async def detect_all(
+        cls,
+        html: str,
+        url: str,
+        headers: Dict[str, str],
+        max_scan: Optional[int] = DEFAULT_MAX_SCAN
+    ) -> Dict[str, Any]:
+        """
+        Run all protocol detections.
+        
+        Args:
+            html: HTML content
+            url: Page URL
+            headers: Response headers
+            max_scan: HTML scan budget (see sample_html); None scans everything
+            
+        Returns:
+            Dictionary with all detected protocols
+        """
+        return cls.detect_all_sync(html, url, headers, max_scan)
+    async def detect(self, html: str, url: str, headers: dict) -> dict:
         """
-        Run all protocol detections (instance-style).
+        Run all protocol detections (instance-style), in the executor if one is set.
 
         Args:
             html: HTML content
@@ -174,4 +253,15 @@ class ProtocolDetector:
         Returns:
             Dictionary with all detected protocols
         """
-        return self.detect_all(html, url, headers)
+        if self.executor is None:
+            return self.detect_all_sync(html, url, headers, self.max_scan)
+        # Sample before handing off so only the windows are pickled to the worker
+        html = self.sample_html(html, self.max_scan)
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self.executor, self.detect_all_sync, html, url, headers, None)
+        except BrokenProcessPool:
+            # A dead worker poisons the pool for good; detect in-process from now on
+            logger.warning("Protocol detection pool broke; falling back to in-process detection")
+            self.executor = None
+            return self.detect_all_sync(html, url, headers, None)
@@ -1,16 +1,18 @@
 """Proxy rotation and health checking for StealthCrawler v17."""
 
 import asyncio
+import heapq
+import itertools
 import logging
-from typing import List, Optional, Dict
+from typing import Any, List, Optional, Dict, Tuple
 from dataclasses import dataclass
-from datetime import datetime, timedelta
 import random
+import time
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class ProxyInfo:
     """Information about a proxy server."""
     url: str
@@ -18,7 +20,7 @@ class ProxyInfo:
     username: Optional[str] = None
     password: Optional[str] = None
     health_score: float = 1.0
-    last_used: Optional[datetime] = None
+    last_used: Optional[float] = None  # time.monotonic() of the last pick
     success_count: int = 0
     failure_count: int = 0
     avg_response_time: float = 0.0
@@ -43,8 +45,24 @@ class ProxyManager:
     
     def __init__(self, proxy_list_file: Optional[str] = None):
         self.proxies: List[ProxyInfo] = []
+        # id(proxy) -> position in self.proxies, for O(1) removal
+        self._index: Dict[int, int] = {}
         self.current_index = 0
         self._lock = asyncio.Lock()
+        self._choice = random.Random().choice
+        # Strategy name -> picker, resolved with one dict lookup per get_proxy call
+        self._strategies = {
+            'round-robin': self._pick_round_robin,
+            'random': self._pick_random,
+            'best-health': self._best_health,
+        }
+        # Health-check clients kept per proxy so repeat rounds reuse connections
+        self._health_clients: Dict[str, Any] = {}
+        # Max-heap of (-health_score, seq, proxy) with lazy deletion: an entry is
+        # live only while its seq is the latest one recorded for that proxy.
+        self._health_heap: List[Tuple[float, int, ProxyInfo]] = []
+        self._health_seq: Dict[int, int] = {}
+        self._seq = itertools.count()
         
         if proxy_list_file:
             self.load_proxies(proxy_list_file)
@@ -103,12 +121,55 @@ class ProxyManager:
                 password=password
             )
             
+            self._index[id(proxy)] = len(self.proxies)
             self.proxies.append(proxy)
+            self._push_health(proxy)
             logger.debug(f"Added proxy: {protocol}://{host}")
             
         except Exception as e:
             logger.error(f"Failed to parse proxy URL {proxy_url}: {e}")
     
+    def _remove_proxy(self, proxy: ProxyInfo) -> None:
+        """Remove a proxy in O(1) by moving the last proxy into its slot."""
+        i = self._index.pop(id(proxy), None)
+        if i is None:
+            return
+        last = self.proxies.pop()
+        if last is not proxy:
+            self.proxies[i] = last
+            self._index[id(last)] = i
+        self._health_seq.pop(id(proxy), None)
+        if self.current_index >= len(self.proxies):
+            self.current_index = 0
+    
+    def _push_health(self, proxy: ProxyInfo) -> None:
+        """Record the proxy's current health score in the best-health heap."""
+        seq = next(self._seq)
+        self._health_seq[id(proxy)] = seq
+        heapq.heappush(self._health_heap, (-proxy.health_score, seq, proxy))
+        # Rebuild once stale entries dominate so the heap stays O(len(proxies))
+        if len(self._health_heap) > 2 * len(self.proxies) + 16:
+            self._health_heap = [e for e in self._health_heap if self._health_seq.get(id(e[2])) == e[1]]
+            heapq.heapify(self._health_heap)
+    
+    def _pick_round_robin(self) -> ProxyInfo:
+        proxy = self.proxies[self.current_index]
+        self.current_index = (self.current_index + 1) % len(self.proxies)
+        return proxy
+    
+    def _pick_random(self) -> ProxyInfo:
+        return self._choice(self.proxies)
+    
+    def _pick_first(self) -> ProxyInfo:
+        return self.proxies[0]
+    
+    def _best_health(self) -> Optional[ProxyInfo]:
+        """Return the healthiest proxy, discarding stale heap entries."""
+        heap = self._health_heap
+        while heap and self._health_seq.get(id(heap[0][2])) != heap[0][1]:
+            heapq.heappop(heap)
+        return heap[0][2] if heap else None
+    
     async def get_proxy(self, strategy: str = 'round-robin') -> Optional[ProxyInfo]:
         """
         Get next proxy based on strategy.
@@ -123,23 +184,10 @@ class ProxyManager:
             if not self.proxies:
                 return None
             
-            if strategy == 'round-robin':
-                proxy = self.proxies[self.current_index]
-                self.current_index = (self.current_index + 1) % len(self.proxies)
-                
-            elif strategy == 'random':
-                proxy = random.choice(self.proxies)
-                
-            elif strategy == 'best-health':
-                # Sort by health score and choose best
-                healthy = sorted(self.proxies, key=lambda p: p.health_score, reverse=True)
-                proxy = healthy[0] if healthy else None
-                
-            else:
-                proxy = self.proxies[0]
+            proxy = self._strategies.get(strategy, self._pick_first)()
             
             if proxy:
-                proxy.last_used = datetime.utcnow()
+                proxy.last_used = time.monotonic()
             
             return proxy
     
@@ -161,6 +209,8 @@ class ProxyManager:
         
         # Improve health score
         proxy.health_score = min(1.0, proxy.health_score + 0.01)
+        if id(proxy) in self._health_seq:
+            self._push_health(proxy)
         
         logger.debug(f"Proxy success: {proxy.url} (health: {proxy.health_score:.2f})")
     
@@ -181,37 +231,62 @@ class ProxyManager:
         
         # Remove proxy if too unhealthy
         if proxy.health_score < 0.2:
-            self.proxies.remove(proxy)
+            self._remove_proxy(proxy)
             logger.warning(f"Removed unhealthy proxy: {proxy.url}")
+        elif id(proxy) in self._health_seq:
+            self._push_health(proxy)
     
-    async def health_check(self, test_url: str = 'http://example.com') -> None:
+    async def health_check(self, test_url: str = 'http://example.com', max_concurrency: int = 64) -> None:
         """
-        Perform health check on all proxies.
+        Perform health check on all proxies concurrently.
         
         Args:
             test_url: URL to test proxies against
+            max_concurrency: Maximum number of proxies checked at once
         """
         logger.info("Starting proxy health check")
         
         import httpx
         
-        for proxy in self.proxies:
-            try:
-                async with httpx.AsyncClient(proxies=proxy.get_proxy_url(), timeout=10.0) as client:
-                    start_time = asyncio.get_event_loop().time()
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def check_one(proxy: ProxyInfo) -> None:
+            async with semaphore:
+                proxy_url = proxy.get_proxy_url()
+                client = self._health_clients.get(proxy_url)
+                if client is None:
+                    client = self._health_clients[proxy_url] = httpx.AsyncClient(proxy=proxy_url, timeout=10.0)
+                try:
+                    start_time = asyncio.get_running_loop().time()
                     response = await client.get(test_url)
-                    response_time = asyncio.get_event_loop().time() - start_time
+                    response_time = asyncio.get_running_loop().time() - start_time
                     
                     if response.status_code == 200:
                         await self.report_success(proxy, response_time)
                     else:
                         await self.report_failure(proxy, f"Status: {response.status_code}")
                         
-            except Exception as e:
-                await self.report_failure(proxy, str(e))
+                except Exception as e:
+                    await self.report_failure(proxy, str(e))
+                if id(proxy) not in self._index:
+                    # Proxy was dropped as unhealthy; its client won't be used again
+                    await self._close_health_client(proxy_url)
+        
+        # Snapshot the pool: failing proxies are removed while checks are running
+        await asyncio.gather(*(check_one(p) for p in list(self.proxies)))
         
         logger.info(f"Health check complete. Active proxies: {len(self.proxies)}")
     
+    async def _close_health_client(self, proxy_url: str) -> None:
+        client = self._health_clients.pop(proxy_url, None)
+        if client is not None:
+            await client.aclose()
+    
+    async def close(self) -> None:
+        """Close the cached health-check clients."""
+        for proxy_url in list(self._health_clients):
+            await self._close_health_client(proxy_url)
+    
     def get_statistics(self) -> Dict:
         """Get proxy pool statistics."""
         if not self.proxies:
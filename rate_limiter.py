@@ -25,28 +25,32 @@ class RateLimiter:
     - Exponential backoff on error/429/5xx
     - Success shortens wait on streak
     """
-    def __init__(self, requests_per_second: float = 2.0, adaptive: bool = True):
-        self.requests_per_second = requests_per_second
-        self.adaptive = adaptive
-        self.min_interval = 1.0 / requests_per_second
-        self.current_interval = self.min_interval
+    def __init__(self, requests_per_second: float = 2.0, adaptive: bool = True) -> None:
+        self.requests_per_second: float = requests_per_second
+        self.adaptive: bool = adaptive
+        self.min_interval: float = 1.0 / requests_per_second
+        self.current_interval: float = self.min_interval
         self.last_request_time: Optional[float] = None
-        self.error_count = 0
-        self.success_count = 0
-        self._lock = asyncio.Lock()
+        self.error_count: int = 0
+        self.success_count: int = 0
+        # Private generator: jitter draws don't touch the module-level random state
+        self._jitter = random.Random().uniform
 
     async def acquire(self) -> None:
         """Acquire permission to make a request (throttled)."""
-        async with self._lock:
-            now = time.time()
-            if self.last_request_time is not None:
-                elapsed = now - self.last_request_time
-                wait_time = self.current_interval - elapsed
-                if wait_time > 0:
-                    jitter = wait_time * random.uniform(-0.1, 0.1)
-                    await asyncio.sleep(wait_time + jitter)
-            self.last_request_time = time.time()
-            logger.debug(f"Rate limit acquired (interval: {self.current_interval:.3f}s)")
+        # Reserve this request's slot before sleeping. There is no await between the
+        # read and the write, so this is atomic on the event loop and concurrent
+        # callers queue behind each other without a lock held over the sleep.
+        now = time.monotonic()
+        interval = self.current_interval
+        wait_time = 0.0
+        if self.last_request_time is not None:
+            wait_time = interval - (now - self.last_request_time)
+        self.last_request_time = now + max(0.0, wait_time)
+        if wait_time > 0:
+            jitter = wait_time * self._jitter(-0.1, 0.1)
+            await asyncio.sleep(wait_time + jitter)
+        logger.debug(f"Rate limit acquired (interval: {interval:.3f}s)")
 
     def report_success(self) -> None:
         """Call this after a successful request to adaptively increase rate (if many in a row)."""
@@ -89,33 +93,33 @@ class TokenBucketLimiter:
 
     Safe for many concurrent awaits.
     """
-    def __init__(self, rate: int, period: int = 1):
-        self.capacity = rate
-        self.tokens = rate
-        self.rate = rate
-        self.period = period
-        self.updated_at = time.monotonic()
-        self.lock = asyncio.Lock()
+    def __init__(self, rate: int, period: int = 1) -> None:
+        self.capacity: int = rate
+        self.tokens: float = float(rate)
+        self.rate: int = rate
+        self.period: int = period
+        self.updated_at: float = time.monotonic()
 
-    async def acquire(self):
-        async with self.lock:
-            now = time.monotonic()
-            elapsed = now - self.updated_at
-            # Refill tokens
-            if elapsed > 0:
-                refill = int(elapsed * self.rate // self.period)
-                self.tokens = min(self.capacity, self.tokens + refill)
-                if refill > 0:
-                    self.updated_at = now
-            while self.tokens < 1:
-                need = 1 - self.tokens
-                await asyncio.sleep(self.period / self.rate * need)
-                now = time.monotonic()
-                elapsed = now - self.updated_at
-                refill = int(elapsed * self.rate // self.period)
-                self.tokens = min(self.capacity, self.tokens + refill)
-                if refill > 0:
-                    self.updated_at = now
-            self.tokens -= 1
-            logger.debug(f"TokenBucketLimiter used: {self.tokens}/{self.capacity} tokens left")
+    def _refill(self) -> None:
+        """Credit tokens for the time elapsed since the last refill."""
+        now = time.monotonic()
+        elapsed = now - self.updated_at
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate / self.period)
+            self.updated_at = now
 
+    async def acquire(self) -> None:
+        # Refill and claim run without an await in between, which is atomic on the
+        # event loop. When the bucket is empty the token is reserved up front
+        # (tokens goes negative) and the caller sleeps exactly until it is earned,
+        # so waiters queue up in order without a lock or a re-check loop.
+        self._refill()
+        self.tokens -= 1
+        logger.debug(f"TokenBucketLimiter used: {self.tokens:.2f}/{self.capacity} tokens left")
+        if self.tokens < 0:
+            try:
+                await asyncio.sleep(-self.tokens * self.period / self.rate)
+            except asyncio.CancelledError:
+                # The reserved token was never used; hand it back for later callers
+                self.tokens += 1
+                raise
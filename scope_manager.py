@@ -1,12 +1,104 @@
 """Scope management for StealthCrawler v18+ with strict and feature-full wildcard/exclusion support."""
 
-from urllib.parse import urlparse
-from typing import List, Set, Optional
+from typing import Dict, List, Set, Optional
+from dataclasses import dataclass, field
 import logging
+import re
+from urllib.parse import urlparse
 from utils import normalize_url
 
 logger = logging.getLogger(__name__)
 
+# Pattern kinds stored on trie nodes
+EXACT = 1       # domain.tld
+SUBDOMAIN = 2   # *.domain.tld
+DEEP = 4        # **.domain.tld
+
+_KIND_NAMES = {EXACT: 'exact', SUBDOMAIN: 'subdomain', DEEP: 'deep'}
+
+# Scope decisions are per hostname; nav/footer links repeat the same few hosts
+DECISION_CACHE_SIZE = 4096
+
+# RFC 3986 scheme followed by '://': the only shape _fast_hostname slices itself
+_SCHEME_PREFIX_RE = re.compile(r'[A-Za-z][A-Za-z0-9+.-]*://')
+
+
+def _fast_hostname(url: str) -> str:
+    """
+    Slice the lowercased hostname out of a URL without a full parse.
+
+    Matches urlparse(normalize_url(url)).hostname, but for the usual
+    scheme://host/... URL only touches the authority part: no ParseResult,
+    no path/query work. Anything else (scheme-relative //host, embedded
+    whitespace or control characters that urlparse strips) takes that
+    slow path, so an exclusion can't be sidestepped by a stray tab.
+    """
+    url = url.strip()
+    m = _SCHEME_PREFIX_RE.match(url)
+    if m is None or ' ' in url or not url.isprintable():
+        return (urlparse(normalize_url(url)).hostname or '').lower()
+    start = m.end()
+    end = len(url)
+    for sep in '/?#':
+        j = url.find(sep, start, end)
+        if j >= 0:
+            end = j
+    at = url.rfind('@', start, end)
+    if at >= 0:
+        start = at + 1  # drop user:pass@
+    host = url[start:end]
+    if '[' in host or ']' in host:
+        # IPv6 literals (and malformed brackets) are rare: let urlparse decide
+        return (urlparse(normalize_url(url)).hostname or '').lower()
+    return host.partition(':')[0].lower()
+
+
+@dataclass(slots=True)
+class _DomainTrieNode:
+    """One hostname label in a reverse-domain trie (com -> example -> api)."""
+    children: Dict[str, '_DomainTrieNode'] = field(default_factory=dict)
+    kinds: int = 0  # EXACT/SUBDOMAIN/DEEP bits of the patterns ending here
+
+
+class _DomainTrie:
+    """
+    Reverse-label trie over scope patterns.
+
+    A lookup walks the hostname's labels from the TLD down, so its cost is
+    the number of labels rather than the number of patterns.
+    """
+
+    def __init__(self) -> None:
+        self.root = _DomainTrieNode()
+
+    def add(self, base: str, kind: int) -> None:
+        node = self.root
+        for label in reversed(base.split('.')):
+            child = node.children.get(label)
+            if child is None:
+                child = node.children[label] = _DomainTrieNode()
+            node = child
+        node.kinds |= kind
+
+    def match(self, hostname: str) -> int:
+        """Return the kind of the first pattern matching hostname, or 0."""
+        labels = hostname.split('.')
+        remaining = len(labels)
+        node = self.root
+        for label in reversed(labels):
+            node = node.children.get(label)
+            if node is None:
+                return 0
+            remaining -= 1
+            if node.kinds:
+                # Exact needs the whole hostname, subdomain exactly one more label
+                allowed = DEEP | (EXACT if remaining == 0 else SUBDOMAIN if remaining == 1 else 0)
+                hit = node.kinds & allowed
+                if hit:
+                    return hit & -hit
+        return 0
+
+
 class ScopeManager:
     """
     Manages URL scope with strict wildcard support and exclusion priority.
@@ -29,6 +121,15 @@ class ScopeManager:
         self.out_of_scope_domains: Set[str] = set()
         self.out_of_scope_subdomains: Set[str] = set()
         self.out_of_scope_deep: Set[str] = set()
+        # Patterns as added (lowercased), for callers that want the raw list
+        self.in_scope_patterns: List[str] = []
+        self.out_of_scope_patterns: List[str] = []
+        self._in_trie = _DomainTrie()
+        self._out_trie = _DomainTrie()
+        # hostname -> is_in_scope decision, cleared whenever a pattern is added
+        self._decision_cache: Dict[str, bool] = {}
+        # Set by add_in_scope; spares _decide re-checking three sets per host
+        self._has_inclusions = False
         if in_scope:
             for pat in in_scope:
                 self.add_in_scope(pat)
@@ -37,77 +138,75 @@ class ScopeManager:
                 self.add_out_of_scope(pat)
 
     def add_in_scope(self, pattern: str) -> None:
+        self._decision_cache.clear()
+        self._has_inclusions = True
         pattern = pattern.lower().strip()
+        self.in_scope_patterns.append(pattern)
         if pattern.startswith("**."):
             self.in_scope_deep.add(pattern[3:])
+            self._in_trie.add(pattern[3:], DEEP)
             if self.logger:
                 self.logger.debug(f"Added in-scope deep wildcard: {pattern}")
         elif pattern.startswith("*."):
             self.in_scope_subdomains.add(pattern[2:])
+            self._in_trie.add(pattern[2:], SUBDOMAIN)
             if self.logger:
                 self.logger.debug(f"Added in-scope subdomain wildcard: {pattern}")
         else:
             self.in_scope_domains.add(pattern)
+            self._in_trie.add(pattern, EXACT)
             if self.logger:
                 self.logger.debug(f"Added in-scope exact: {pattern}")
 
     def add_out_of_scope(self, pattern: str) -> None:
+        self._decision_cache.clear()
         pattern = pattern.lower().strip()
+        self.out_of_scope_patterns.append(pattern)
         if pattern.startswith("**."):
             self.out_of_scope_deep.add(pattern[3:])
+            self._out_trie.add(pattern[3:], DEEP)
             if self.logger:
                 self.logger.debug(f"Added out-of-scope deep wildcard: {pattern}")
         elif pattern.startswith("*."):
             self.out_of_scope_subdomains.add(pattern[2:])
+            self._out_trie.add(pattern[2:], SUBDOMAIN)
             if self.logger:
                 self.logger.debug(f"Added out-of-scope subdomain wildcard: {pattern}")
         else:
             self.out_of_scope_domains.add(pattern)
+            self._out_trie.add(pattern, EXACT)
             if self.logger:
                 self.logger.debug(f"Added out-of-scope exact: {pattern}")
 
     def is_in_scope(self, url: str) -> bool:
-        url = normalize_url(url)
-        hostname = urlparse(url).hostname or ''
-        hostname = hostname.lower()
-
-        # 1. Exclusion priority (deep, subdomain, exact)
-        for base in self.out_of_scope_deep:
-            if hostname == base or hostname.endswith('.' + base):
-                if self.logger:
-                    self.logger.debug(f"OUT OF SCOPE (deep exclusion): {hostname} vs {base}")
-                return False
-        for base in self.out_of_scope_subdomains:
-            # Only direct subdomain match (e.g., foo.domain.com)
-            parts = hostname.split('.', maxsplit=1)
-            if len(parts) == 2 and parts[1] == base:
-                if self.logger:
-                    self.logger.debug(f"OUT OF SCOPE (subdomain exclusion): {hostname} vs {base}")
-                return False
-        if hostname in self.out_of_scope_domains:
+        # Hostname-only decision: no need to normalize or fully parse the URL
+        return self._is_host_in_scope(_fast_hostname(url))
+
+    def _is_host_in_scope(self, hostname: str) -> bool:
+        decision = self._decision_cache.get(hostname)
+        if decision is None:
+            if len(self._decision_cache) >= DECISION_CACHE_SIZE:
+                self._decision_cache.clear()
+            decision = self._decision_cache[hostname] = self._decide(hostname)
+        return decision
+
+    def _decide(self, hostname: str) -> bool:
+        # 1. Exclusion priority
+        kind = self._out_trie.match(hostname)
+        if kind:
             if self.logger:
-                self.logger.debug(f"OUT OF SCOPE (exact exclusion): {hostname}")
+                self.logger.debug(f"OUT OF SCOPE ({_KIND_NAMES[kind]} exclusion): {hostname}")
             return False
 
         # 2. If no inclusions, only exclusions matter (everything else is in scope)
-        if not (self.in_scope_domains or self.in_scope_subdomains or self.in_scope_deep):
+        if not self._has_inclusions:
             return True
 
-        # 3. Inclusion matchers (deep, subdomain, exact)
-        for base in self.in_scope_deep:
-            if hostname == base or hostname.endswith('.' + base):
-                if self.logger:
-                    self.logger.debug(f"IN SCOPE (deep): {hostname} vs {base}")
-                return True
-        for base in self.in_scope_subdomains:
-            parts = hostname.split('.', maxsplit=1)
-            if len(parts) == 2 and parts[1] == base:
-                if self.logger:
-                    self.logger.debug(f"IN SCOPE (subdomain): {hostname} vs {base}")
-                return True
-        if hostname in self.in_scope_domains:
+        # 3. Inclusion matchers
+        kind = self._in_trie.match(hostname)
+        if kind:
             if self.logger:
-                self.logger.debug(f"IN SCOPE (exact): {hostname}")
+                self.logger.debug(f"IN SCOPE ({_KIND_NAMES[kind]}): {hostname}")
             return True
 
         if self.logger:
@@ -115,7 +214,17 @@ class ScopeManager:
         return False
 
     def filter_urls(self, urls: List[str]) -> List[str]:
-        return [url for url in urls if self.is_in_scope(url)]
+        # One scope decision per distinct hostname in the batch
+        decisions: Dict[str, bool] = {}
+        kept = []
+        for url in urls:
+            hostname = _fast_hostname(url)
+            decision = decisions.get(hostname)
+            if decision is None:
+                decision = decisions[hostname] = self._is_host_in_scope(hostname)
+            if decision:
+                kept.append(url)
+        return kept
 
     def get_scope_summary(self) -> dict:
         return {
@@ -135,30 +244,24 @@ class ScopeManager:
 
     def test_url(self, url: str) -> dict:
         normalized = normalize_url(url)
-        hostname = urlparse(url).hostname or ''
-        hostname = hostname.lower()
-        in_scope = self.is_in_scope(url)
+        hostname = _fast_hostname(url)
+        in_scope = self._is_host_in_scope(hostname)
         matches_in = []
         matches_out = []
         if hostname:
-            if hostname in self.in_scope_domains:
-                matches_in.append(f"exact: {hostname}")
-            for sub in self.in_scope_subdomains:
-                parts = hostname.split('.', maxsplit=1)
-                if len(parts) == 2 and parts[1] == sub:
-                    matches_in.append(f"subdomain: {sub}")
-            for deep in self.in_scope_deep:
-                if hostname == deep or hostname.endswith('.' + deep):
-                    matches_in.append(f"deep: {deep}")
-            if hostname in self.out_of_scope_domains:
-                matches_out.append(f"exact: {hostname}")
-            for sub in self.out_of_scope_subdomains:
-                parts = hostname.split('.', maxsplit=1)
-                if len(parts) == 2 and parts[1] == sub:
-                    matches_out.append(f"subdomain: {sub}")
-            for deep in self.out_of_scope_deep:
-                if hostname == deep or hostname.endswith('.' + deep):
-                    matches_out.append(f"deep: {deep}")
+            # Every dotted suffix of the hostname: a.b.c -> [a.b.c, b.c, c]
+            labels = hostname.split('.')
+            suffixes = ['.'.join(labels[i:]) for i in range(len(labels))]
+            parent = suffixes[1] if len(suffixes) > 1 else None
+            for domains, subdomains, deep_bases, matches in (
+                (self.in_scope_domains, self.in_scope_subdomains, self.in_scope_deep, matches_in),
+                (self.out_of_scope_domains, self.out_of_scope_subdomains, self.out_of_scope_deep, matches_out),
+            ):
+                if hostname in domains:
+                    matches.append(f"exact: {hostname}")
+                if parent in subdomains:
+                    matches.append(f"subdomain: {parent}")
+                matches.extend(f"deep: {base}" for base in suffixes if base in deep_bases)
         return {
             'url': url,
             'normalized': normalized,
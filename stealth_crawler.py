@@ -1,21 +1,31 @@
 """Core async crawler with Playwright for StealthCrawler v17/v18 (God Mode compatible)."""
 
 import asyncio
+import gzip
 import logging
-from typing import Optional, List, Dict, Set, Any
-from datetime import datetime
+import os
+import threading
+import time
+from typing import Callable, Optional, List, Dict, Set, Any
+from datetime import datetime, timezone
 from playwright.async_api import async_playwright, Browser, BrowserContext, Page
 from urllib.parse import urljoin
 
 from config import CrawlerConfig
 from scope_manager import ScopeManager
-from utils import normalize_url, extract_links, get_domain
+from utils import normalize_url, extract_links, get_domain, json_dumps
 from rate_limiter import RateLimiter
 from fingerprint import FingerprintRandomizer
 
 class CrawlResult:
     """Represents the result of crawling a single URL."""
 
+    # One instance per crawled page: no per-instance __dict__
+    __slots__ = (
+        'url', 'status', 'success', 'title', 'html', 'screenshot', 'links',
+        'depth', '_ts_ns', 'error', 'headers', 'html_path', 'screenshot_path'
+    )
+
     def __init__(self, url: str, status: int = 0, success: bool = False):
         self.url = url
         self.status = status
@@ -25,9 +35,18 @@ class CrawlResult:
         self.screenshot: Optional[bytes] = None
         self.links: List[str] = []
         self.depth: int = 0
-        self.timestamp = datetime.utcnow()
+        # Raw epoch ns; the datetime is only built when someone reads it
+        self._ts_ns = time.time_ns()
         self.error: Optional[str] = None
         self.headers: Dict[str, str] = {}
+        # Set when a results sink has moved html/screenshot to disk
+        self.html_path: Optional[str] = None
+        self.screenshot_path: Optional[str] = None
+
+    @property
+    def timestamp(self) -> datetime:
+        """Crawl time as a naive UTC datetime (same shape utcnow() produced)."""
+        return datetime.fromtimestamp(self._ts_ns / 1e9, tz=timezone.utc).replace(tzinfo=None)
 
     def to_dict(self) -> dict:
         """Convert to dictionary."""
@@ -43,6 +62,59 @@ class CrawlResult:
             'headers': self.headers
         }
 
+class DiskResultSink:
+    """
+    Stream crawl results to disk so the crawler only keeps metadata in memory.
+
+    Each result is appended as one line to results.jsonl; its HTML goes to
+    <n>.html.gz and its screenshot to <n>.png next to it. Numbering carries
+    on from an existing results.jsonl, so a rerun into the same directory
+    never overwrites files that earlier records point at. Calls are
+    thread-safe: the crawler runs the sink through asyncio.to_thread.
+    """
+
+    def __init__(self, directory: str, save_html: bool = True, save_screenshots: bool = True):
+        self.directory = directory
+        self.save_html = save_html
+        self.save_screenshots = save_screenshots
+        os.makedirs(directory, exist_ok=True)
+        self.index_path = os.path.join(directory, 'results.jsonl')
+        self.count = self._indexed_count()
+        self._lock = threading.Lock()
+
+    def _indexed_count(self) -> int:
+        """Number of records already in results.jsonl (0 when it doesn't exist)."""
+        try:
+            with open(self.index_path, 'rb') as f:
+                return sum(1 for _ in f)
+        except FileNotFoundError:
+            return 0
+
+    def __call__(self, result: 'CrawlResult') -> None:
+        with self._lock:
+            self.count += 1
+            stem = os.path.join(self.directory, str(self.count))
+
+        if result.html is not None and self.save_html:
+            result.html_path = stem + '.html.gz'
+            with gzip.open(result.html_path, 'wt', encoding='utf-8', compresslevel=5) as f:
+                f.write(result.html)
+        if result.screenshot is not None and self.save_screenshots:
+            result.screenshot_path = stem + '.png'
+            with open(result.screenshot_path, 'wb') as f:
+                f.write(result.screenshot)
+
+        record = result.to_dict()
+        record['html_path'] = result.html_path
+        record['screenshot_path'] = result.screenshot_path
+        line = json_dumps(record) + '\n'
+        with self._lock, open(self.index_path, 'a', encoding='utf-8') as f:
+            f.write(line)
+
+        result.html = None
+        result.screenshot = None
+
+
 class StealthCrawler:
     """
     Advanced async web crawler with stealth features.
@@ -56,9 +128,16 @@ class StealthCrawler:
     - Screenshot capture
     """
 
-    def __init__(self, config: Optional[CrawlerConfig] = None, logger: Optional[logging.Logger] = None):
+    def __init__(
+        self,
+        config: Optional[CrawlerConfig] = None,
+        logger: Optional[logging.Logger] = None,
+        executor=None
+    ):
         self.config = config or CrawlerConfig()
         self.logger = logger or logging.getLogger(__name__)
+        # concurrent.futures executor for link extraction; None uses the loop's default thread pool
+        self.executor = executor
         self.scope_manager = ScopeManager()
         self.rate_limiter = RateLimiter(
             requests_per_second=self.config.requests_per_second,
@@ -70,6 +149,14 @@ class StealthCrawler:
         self.visited: Set[str] = set()
         self.queue: asyncio.Queue = asyncio.Queue()
         self.results: List[CrawlResult] = []
+        # Called (in a worker thread) with each finished result; it may offload html/screenshot
+        self.results_sink: Optional[Callable[[CrawlResult], None]] = None
+        if self.config.spill_results:
+            self.results_sink = DiskResultSink(
+                os.path.join(self.config.export_dir, 'pages'),
+                save_html=self.config.save_html,
+                save_screenshots=self.config.save_screenshots
+            )
         self.running = False
 
     async def initialize(self) -> None:
@@ -177,8 +264,12 @@ class StealthCrawler:
 
         while self.running:
             try:
-                # Get URL from queue with timeout
-                url, depth = await asyncio.wait_for(self.queue.get(), timeout=1.0)
+                # Get URL from queue; only pay for wait_for (timeout handle,
+                # extra task on 3.11) when the queue is actually empty
+                try:
+                    url, depth = self.queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    url, depth = await asyncio.wait_for(self.queue.get(), timeout=1.0)
 
                 try:
                     # Skip if already visited
@@ -192,18 +283,23 @@ class StealthCrawler:
 
                     # Crawl the page
                     result = await self._crawl_page(url, depth)
+                    if self.results_sink is not None:
+                        # gzip/PNG/index writes are blocking file I/O; keep them off the loop
+                        await asyncio.to_thread(self.results_sink, result)
                     self.results.append(result)
 
                     # Add new links to queue if within depth
                     if depth < max_depth and result.success:
-                        for link in result.links:
-                            normalized = normalize_url(link)
-                            in_scope = self.scope_manager.is_in_scope(normalized) ## added
-                            if normalized not in self.visited and self.scope_manager.is_in_scope(normalized):
-                                self.logger.debug(f"[ENQUEUE] In scope, queueing: {normalized}") ## added
-                                await self.queue.put((normalized, depth + 1))
-                            else:
-                                self.logger.debug(f"[SKIP] Out of scope or already visited, skipping: {normalized}") ## added
+                        # extract_links already returns unique, normalized URLs;
+                        # scope-filter the whole page's links in one call
+                        in_scope = self.scope_manager.filter_urls(result.links)
+                        self.logger.debug(f"[SCOPE] {len(in_scope)}/{len(result.links)} links in scope on {url}")
+                        new_links = [link for link in in_scope if link not in self.visited]
+                        # The queue is unbounded, so put_nowait never blocks: enqueue
+                        # the page's batch in one synchronous pass, no await per URL
+                        for link in new_links:
+                            self.queue.put_nowait((link, depth + 1))
+                        self.logger.debug(f"[ENQUEUE] {len(new_links)} new links from {url}")
 
                 except Exception as e:
                     self.logger.error(f"Worker {worker_id} error processing {url}: {e}")
@@ -247,14 +343,16 @@ class StealthCrawler:
             if response:
                 result.status = response.status
                 result.success = 200 <= response.status < 300
-                result.headers = dict(response.headers)
+                # Playwright already hands back a fresh dict; no need to copy it again
+                result.headers = response.headers
 
             # Get page content
             result.title = await page.title()
             result.html = await page.content()
 
-            # Extract links
-            result.links = extract_links(result.html, url)
+            # Extract links off the event loop so other workers keep running
+            loop = asyncio.get_running_loop()
+            result.links = await loop.run_in_executor(self.executor, extract_links, result.html, url)
 
             # Take screenshot if configured
             if self.config.save_screenshots and result.success:
@@ -7,8 +7,13 @@ from typing import Generator
 
 @pytest.fixture(scope="session")
 def event_loop() -> Generator:
-    """Create an instance of the default event loop for the test session."""
-    loop = asyncio.get_event_loop_policy().new_event_loop()
+    """Create an event loop for the test session (uvloop when installed)."""
+    try:
+        import uvloop
+        policy = uvloop.EventLoopPolicy()
+    except ImportError:
+        policy = asyncio.get_event_loop_policy()
+    loop = policy.new_event_loop()
     yield loop
     loop.close()
 
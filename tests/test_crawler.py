@@ -2,7 +2,7 @@
 
 import pytest
 from unittest.mock import Mock, AsyncMock, patch
-from stealth_crawler import StealthCrawler, CrawlResult
+from stealth_crawler import StealthCrawler, CrawlResult, DiskResultSink
 from config import CrawlerConfig
 
 
@@ -37,6 +37,44 @@ class TestCrawlResult:
         assert 'timestamp' in data
 
 
+class TestDiskResultSink:
+    """Test DiskResultSink class."""
+    
+    def test_sink_moves_payload_to_disk(self, tmp_path):
+        """Test that the sink writes html/screenshot out and drops them from the result."""
+        sink = DiskResultSink(str(tmp_path))
+        result = CrawlResult("https://example.com", status=200, success=True)
+        result.html = "<html><body>Test</body></html>"
+        result.screenshot = b"\x89PNG"
+        
+        sink(result)
+        
+        assert result.html is None
+        assert result.screenshot is None
+        assert (tmp_path / "1.html.gz").exists()
+        assert (tmp_path / "1.png").read_bytes() == b"\x89PNG"
+        
+        lines = (tmp_path / "results.jsonl").read_text().splitlines()
+        assert len(lines) == 1
+        assert '"url":"https://example.com"' in lines[0].replace(" ", "")
+    
+    def test_sink_continues_numbering_on_rerun(self, tmp_path):
+        """Test that a second sink in the same directory doesn't overwrite earlier files."""
+        first = CrawlResult("https://example.com/1", status=200, success=True)
+        first.html = "<html>first</html>"
+        DiskResultSink(str(tmp_path))(first)
+        
+        second = CrawlResult("https://example.com/2", status=200, success=True)
+        second.html = "<html>second</html>"
+        DiskResultSink(str(tmp_path))(second)
+        
+        assert first.html_path.endswith("1.html.gz")
+        assert second.html_path.endswith("2.html.gz")
+        lines = (tmp_path / "results.jsonl").read_text().splitlines()
+        assert len(lines) == 2
+        assert "example.com/1" in lines[0] and first.html_path in lines[0]
+
+
 class TestStealthCrawler:
     """Test StealthCrawler class."""
     
@@ -0,0 +1,186 @@
+"""Tests for the ReconOrchestrator shutdown path in main."""
+
+import asyncio
+import json
+import threading
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+import main
+
+
+@pytest.fixture
+def state(tmp_path, monkeypatch):
+    """CrawlState writing its results, checkpoints and URL cache under tmp_path."""
+    monkeypatch.chdir(tmp_path)
+    args = SimpleNamespace(cache_dir=str(tmp_path / 'cache'), export='json', checkpoint_every=50)
+    return main.CrawlState(args, Mock())
+
+
+def _ndjson(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def _orchestrator(crawl):
+    orchestrator = object.__new__(main.ReconOrchestrator)
+    orchestrator.logger = Mock()
+    orchestrator.cpu_pool = Mock()
+    orchestrator.webhooks = Mock(close=AsyncMock())
+    orchestrator.vision = Mock(close=AsyncMock())
+    orchestrator.proxy_manager = Mock(close=AsyncMock())
+    orchestrator._crawl_main = crawl
+    return orchestrator
+
+
+class TestCrawlShutdown:
+    """Test that crawl_main always releases its resources."""
+
+    @pytest.mark.asyncio
+    async def test_clients_closed_when_crawl_fails(self):
+        """Test webhooks/vision are closed (flushing buffered errors) on SystemExit."""
+        async def crawl():
+            raise SystemExit("Fatal: No URLs to crawl.")
+
+        orchestrator = _orchestrator(crawl)
+        with pytest.raises(SystemExit):
+            await orchestrator.crawl_main()
+
+        orchestrator.cpu_pool.shutdown.assert_called_once()
+        orchestrator.webhooks.close.assert_awaited_once()
+        orchestrator.vision.close.assert_awaited_once()
+        orchestrator.proxy_manager.close.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_one_close_failing_does_not_skip_the_others(self):
+        """Test a failing close() is logged and the remaining clients still close."""
+        async def crawl():
+            return None
+
+        orchestrator = _orchestrator(crawl)
+        orchestrator.webhooks.close.side_effect = RuntimeError('network down')
+        await orchestrator.crawl_main()
+
+        orchestrator.vision.close.assert_awaited_once()
+        orchestrator.logger.warning.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_disabled_clients_are_skipped(self):
+        """Test that clients left as None (e.g. no --proxy) are not closed."""
+        async def crawl():
+            return None
+
+        orchestrator = _orchestrator(crawl)
+        orchestrator.proxy_manager = None
+        await orchestrator.crawl_main()
+
+        orchestrator.webhooks.close.assert_awaited_once()
+        orchestrator.logger.warning.assert_not_called()
+
+
+class TestPartialResults:
+    """Test the results_partial.ndjson flushes."""
+
+    @pytest.mark.asyncio
+    async def test_flushes_append_only_new_results(self, state):
+        """Test each partial flush appends the results gathered since the previous one."""
+        await state.reset_partial_results()
+        state.pending_results.append({'url': 'https://example.com/a'})
+        await state.flush_results()
+        await state.flush_results()  # nothing pending: no write
+        state.pending_results.append({'url': 'https://example.com/b'})
+        await state.flush_results()
+
+        assert _ndjson(state.partial_path) == [{'url': 'https://example.com/a'}, {'url': 'https://example.com/b'}]
+        assert state.flush_count == 2
+
+    @pytest.mark.asyncio
+    async def test_new_crawl_truncates_previous_run(self, state):
+        """Test a stale partial file from an earlier run is emptied."""
+        state.partial_path.write_text('{"url": "https://old.example.com/"}\n')
+
+        await state.reset_partial_results()
+
+        assert state.partial_path.read_bytes() == b''
+
+    @pytest.mark.asyncio
+    async def test_resume_seeds_partial_file_with_restored_results(self, state):
+        """Test results restored from a checkpoint head the new partial file."""
+        state.restore({
+            'visited_urls': ['https://example.com/', 'https://example.com/next'],
+            'queue': ['https://example.com/next'],
+            'results': {'https://example.com/': {'url': 'https://example.com/', 'status': 200}},
+        })
+        await state.reset_partial_results()
+        state.pending_results.append({'url': 'https://example.com/next', 'status': 200})
+        await state.flush_results()
+
+        assert [r['url'] for r in _ndjson(state.partial_path)] == ['https://example.com/', 'https://example.com/next']
+
+    def test_restore_requeues_claimed_urls(self, state):
+        """Test queued URLs are restored even though they are already marked visited."""
+        state.restore({'visited_urls': ['https://example.com/next'], 'queue': ['https://example.com/next']})
+
+        assert state.url_queue.qsize() == 1
+        assert 'https://example.com/next' in state.visited_urls
+
+
+class TestCheckpoints:
+    """Test checkpoint snapshots and their throttling."""
+
+    def test_snapshot_copies_queue_in_order(self, state):
+        """Test the snapshot lists queued URLs in order and is detached from live state."""
+        for url in ('https://example.com/1', 'https://example.com/2', 'https://example.com/3'):
+            state.url_queue.put_nowait(url)
+        state.results['https://example.com/0'] = {'status': 200}
+
+        snapshot = state._checkpoint_snapshot()
+        state.url_queue.put_nowait('https://example.com/4')
+        state.results['https://example.com/1'] = {'status': 200}
+
+        assert snapshot['queue'] == ['https://example.com/1', 'https://example.com/2', 'https://example.com/3']
+        assert list(snapshot['results']) == ['https://example.com/0']
+
+    @pytest.mark.asyncio
+    async def test_worker_checkpoints_every_n_urls(self, state):
+        """Test worker 0 writes one checkpoint per checkpoint_every processed URLs."""
+        state.args.checkpoint_every = 3
+        state.save_checkpoint_async = AsyncMock()
+        orchestrator = object.__new__(main.ReconOrchestrator)
+        orchestrator.args = state.args
+        orchestrator.state = state
+        orchestrator.process_url_with_retries = AsyncMock()
+        for i in range(7):
+            state.url_queue.put_nowait(f'https://example.com/{i}')
+
+        worker = asyncio.ensure_future(orchestrator.worker(0))
+        await state.url_queue.join()
+        await state.checkpoint_task
+        worker.cancel()
+        await asyncio.gather(worker, return_exceptions=True)
+
+        assert orchestrator.process_url_with_retries.await_count == 7
+        assert state.save_checkpoint_async.await_count == 2
+        assert state.urls_since_checkpoint == 1
+
+    @pytest.mark.asyncio
+    async def test_checkpoint_written_off_the_event_loop(self, state):
+        """Test save_checkpoint_async writes a loadable checkpoint from a worker thread."""
+        writer_threads = []
+        save = state.checkpoint_manager.save
+
+        def recording_save(name, checkpoint):
+            writer_threads.append(threading.current_thread())
+            return save(name, checkpoint)
+
+        state.checkpoint_manager.save = recording_save
+        state.checkpoint_id = 'run1'
+        state.visited_urls = {'https://example.com/'}
+        state.results['https://example.com/'] = {'status': 200}
+
+        await state.save_checkpoint_async()
+
+        assert writer_threads and writer_threads[0] is not threading.main_thread()
+        loaded = state.checkpoint_manager.load('run1')
+        assert loaded['visited_urls'] == ['https://example.com/']
+        assert loaded['results'] == {'https://example.com/': {'status': 200}}
@@ -0,0 +1,47 @@
+"""Tests for pattern_library module."""
+
+import pytest
+from pattern_library import PatternLibrary
+
+
+class TestPatternLibrary:
+    """Test PatternLibrary class."""
+
+    def test_numeric_id_placeholder(self):
+        """Test that plain numbers become {id}."""
+        library = PatternLibrary()
+
+        assert library._extract_pattern('https://example.com/users/42') == 'https://example.com/users/{id}'
+
+    def test_uuid_placeholder(self):
+        """Test that UUIDs become {uuid} instead of being split into {id}s."""
+        library = PatternLibrary()
+        url = 'https://example.com/orders/123e4567-e89b-12d3-a456-426614174000/items'
+
+        assert library._extract_pattern(url) == 'https://example.com/orders/{uuid}/items'
+
+    def test_hash_placeholder(self):
+        """Test that 32+ hex character runs become {hash}."""
+        library = PatternLibrary()
+        url = 'https://example.com/static/d41d8cd98f00b204e9800998ecf8427e.js'
+
+        assert library._extract_pattern(url) == 'https://example.com/static/{hash}.js'
+
+    def test_mixed_placeholders(self):
+        """Test UUID, hash and id in one URL."""
+        library = PatternLibrary()
+        url = (
+            'https://example.com/v2/123E4567-E89B-12D3-A456-426614174000/'
+            'da39a3ee5e6b4b0d3255bfef95601890afd80709?page=3'
+        )
+
+        assert library._extract_pattern(url) == 'https://example.com/v{id}/{uuid}/{hash}?page={id}'
+
+    def test_add_url_learns_pattern(self):
+        """Test that add_url records the extracted pattern."""
+        library = PatternLibrary()
+        library.add_url('https://example.com/users/1')
+        library.add_url('https://example.com/users/2')
+
+        assert library.get_patterns() == ['https://example.com/users/{id}']
+        assert library.matches_pattern('https://example.com/users/99', 'https://example.com/users/{id}')
@@ -0,0 +1,160 @@
+"""Tests for protocol_detector module."""
+
+import pytest
+from protocol_detector import ProtocolDetector, SAMPLED_MAX_SCAN, TAIL_SCAN
+
+
+def _large_page(marker):
+    """A page well over the sampling windows with marker only in the middle."""
+    filler = '<p>' + 'lorem ipsum dolor sit amet ' * 20 + '</p>\n'
+    half = filler * (SAMPLED_MAX_SCAN // len(filler) + 10)
+    return f'<html><head><title>Big</title></head><body>{half}{marker}{half}</body></html>'
+
+
+class TestSampling:
+    """Test head/tail sampling of large documents."""
+
+    def test_full_scan_is_the_default(self):
+        """Test that a marker in the middle of a large page is found by default."""
+        html = _large_page("<script>new WebSocket('wss://live.example.com/feed')</script>")
+        assert len(html) > SAMPLED_MAX_SCAN + TAIL_SCAN
+
+        result = ProtocolDetector.detect_all_sync(html, 'https://example.com/', {})
+
+        assert result['websocket'] == 'wss://live.example.com/feed'
+
+    @pytest.mark.asyncio
+    async def test_instance_detect_scans_everything_by_default(self):
+        """Test ProtocolDetector().detect with no executor and no max_scan."""
+        html = _large_page('<a href="/swagger/index.html">API</a>')
+
+        result = await ProtocolDetector().detect(html, 'https://example.com/', {})
+
+        assert result['rest_api'] == {'type': 'rest', 'has_documentation': True, 'detected': True}
+
+    def test_opt_in_sampling_misses_middle_markers(self):
+        """Test the documented recall trade-off of max_scan."""
+        html = _large_page("<script>fetch('/graphql', {body: 'query { me { id } }'})</script>")
+
+        assert ProtocolDetector.detect_all_sync(html, 'https://example.com/', {})['graphql'] is not None
+        sampled = ProtocolDetector.detect_all_sync(html, 'https://example.com/', {}, max_scan=SAMPLED_MAX_SCAN)
+        assert sampled['graphql'] is None
+
+    def test_sample_html_keeps_small_pages_whole(self):
+        """Test that pages within the windows are returned unchanged."""
+        html = '<html>' + 'x' * 1000 + '</html>'
+
+        assert ProtocolDetector.sample_html(html) is html
+        assert ProtocolDetector.sample_html(html, SAMPLED_MAX_SCAN) is html
+
+
+class TestIndicators:
+    """Test GraphQL and API-doc indicator matching."""
+
+    @pytest.mark.parametrize('html', [
+        "<script src='/graphql/client.js'></script>",
+        'schema.graphql',
+        '{"__typename": "User"}',
+        'const q = `query  {\n me }`',
+        'MUTATION{ login }',
+    ])
+    def test_graphql_indicators(self, html):
+        """Test each GraphQL indicator, case-insensitively."""
+        assert ProtocolDetector.detect_graphql(html, 'https://example.com/') is not None
+
+    @pytest.mark.parametrize('html', [
+        '<a href="/api/docs">', '<a href="/api-doc">', 'Swagger UI', 'OpenAPI 3.0',
+    ])
+    def test_api_doc_indicators(self, html):
+        """Test each API documentation indicator, case-insensitively."""
+        result = ProtocolDetector.detect_rest_api('https://example.com/', html)
+
+        assert result == {'type': 'rest', 'has_documentation': True, 'detected': True}
+
+    def test_no_indicators(self):
+        """Test a page with none of the indicators."""
+        html = '<html><body>querying the docs about APIs</body></html>'
+
+        assert ProtocolDetector.detect_graphql(html, 'https://example.com/') is None
+        assert ProtocolDetector.detect_rest_api('https://example.com/', html) is None
+
+
+class TestDetectAll:
+    """Test detect_all / detect_all_sync."""
+
+    @pytest.mark.asyncio
+    async def test_all_detectors_on_one_page(self):
+        """Test every detector's result from one combined call."""
+        html = (
+            "<script>const ws = new WebSocket('wss://example.com/live');"
+            "fetch('/graphql', {body: 'query { me }'});</script>"
+        )
+        headers = {'content-type': 'text/event-stream; charset=utf-8'}
+
+        result = await ProtocolDetector.detect_all(html, 'https://example.com/api/v2/users', headers)
+
+        assert result == {
+            'websocket': 'wss://example.com/live',
+            'graphql': {'endpoint': '/graphql', 'detected': True},
+            'sse': True,
+            'rest_api': {'type': 'rest', 'url': 'https://example.com/api/v2/users', 'detected': True},
+        }
+
+    def test_nothing_detected(self):
+        """Test a plain page."""
+        result = ProtocolDetector.detect_all_sync('<p>hello</p>', 'https://example.com/about', {})
+
+        assert result == {'websocket': None, 'graphql': None, 'sse': False, 'rest_api': None}
+
+
+class TestWebSocketPatterns:
+    """Test the module-level WebSocket patterns."""
+
+    def test_literal_url_wins_over_constructor(self):
+        """Test that a ws:// literal is preferred to a new WebSocket(...) argument."""
+        html = "new WebSocket('/relative'); const url = 'ws://example.com/socket';"
+
+        assert ProtocolDetector.detect_websocket(html, 'https://example.com/') == 'ws://example.com/socket'
+
+    def test_constructor_argument(self):
+        """Test a relative URL passed to new WebSocket(...)."""
+        html = 'var s = new  WebSocket("/socket/updates");'
+
+        assert ProtocolDetector.detect_websocket(html, 'https://example.com/') == '/socket/updates'
+
+    def test_url_stops_at_quote_or_whitespace(self):
+        """Test the end of the captured ws:// URL."""
+        html = "connect('wss://example.com/a?b=1') ws://example.com/b next"
+
+        assert ProtocolDetector.detect_websocket(html, 'https://example.com/') == 'wss://example.com/a?b=1'
+
+
+class TestLowercasedBuffer:
+    """Test matching on html.lower() while reporting original-case captures."""
+
+    def test_capture_keeps_original_case(self):
+        """Test that a mixed-case URL is returned as written in the page."""
+        html = "<script>new WebSocket('wss://Live.Example.com/Feed?Token=AbC')</script>"
+
+        assert ProtocolDetector.detect_websocket(html, 'https://example.com/') == 'wss://Live.Example.com/Feed?Token=AbC'
+
+    def test_graphql_endpoint_keeps_original_case(self):
+        """Test the GraphQL endpoint capture."""
+        html = "<script>fetch('/API/GraphQL', {body: 'Query { me }'})</script>"
+
+        assert ProtocolDetector.detect_graphql(html, 'https://example.com/')['endpoint'] == '/API/GraphQL'
+
+    def test_length_changing_lowercase_falls_back(self):
+        """Test pages where lower() changes offsets (U+0130) still return a capture."""
+        html = "İstanbul <script>new WebSocket('wss://Example.com/ws')</script>"
+        assert len(html.lower()) != len(html)
+
+        assert ProtocolDetector.detect_websocket(html, 'https://example.com/') == 'wss://example.com/ws'
+
+    def test_shared_buffer_matches_per_call_lowercasing(self):
+        """Test passing html_lc gives the same answers as letting each detector lower()."""
+        html = "<a href='/Swagger/'>docs</a><script>new WebSocket('WSS://X.test/s')</script>"
+        html_lc = html.lower()
+
+        assert ProtocolDetector.detect_websocket(html, 'u', html_lc) == ProtocolDetector.detect_websocket(html, 'u')
+        assert ProtocolDetector.detect_rest_api('u', html, html_lc) == ProtocolDetector.detect_rest_api('u', html)
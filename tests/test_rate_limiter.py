@@ -0,0 +1,164 @@
+"""Tests for rate_limiter module."""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+import rate_limiter
+from rate_limiter import RateLimiter, TokenBucketLimiter
+
+
+class _FakeClock:
+    """Stands in for rate_limiter.time (monotonic) and asyncio.sleep, recording sleeps."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.sleeps.append(round(seconds, 6))
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = _FakeClock()
+    monkeypatch.setattr(rate_limiter, 'time', fake)
+    monkeypatch.setattr(rate_limiter.asyncio, 'sleep', fake.sleep)
+    return fake
+
+
+class TestRateLimiter:
+    """Test RateLimiter class."""
+
+    @pytest.mark.asyncio
+    async def test_first_request_does_not_wait(self, clock):
+        """Test the first acquire goes straight through."""
+        limiter = RateLimiter(requests_per_second=2)
+
+        await limiter.acquire()
+
+        assert clock.sleeps == []
+
+    @pytest.mark.asyncio
+    async def test_concurrent_callers_reserve_successive_slots(self, clock):
+        """Test that concurrent acquires queue one interval apart without a lock."""
+        limiter = RateLimiter(requests_per_second=2)
+        limiter._jitter = lambda low, high: 0.0
+
+        await asyncio.gather(*(limiter.acquire() for _ in range(4)))
+
+        assert clock.sleeps == [0.5, 1.0, 1.5]
+
+    @pytest.mark.asyncio
+    async def test_elapsed_monotonic_time_counts(self, clock):
+        """Test that time already elapsed on the monotonic clock is not waited again."""
+        limiter = RateLimiter(requests_per_second=2)
+        limiter._jitter = lambda low, high: 0.0
+
+        await limiter.acquire()
+        clock.now += 0.2
+        await limiter.acquire()
+        clock.now += 1.0
+        await limiter.acquire()
+
+        assert clock.sleeps == [0.3]
+
+    def test_backoff_on_429(self):
+        """Test adaptive backoff and reset."""
+        limiter = RateLimiter(requests_per_second=2)
+
+        limiter.report_error(429)
+        limiter.report_error(503)
+        assert limiter.current_interval == 0.5 * 4
+
+        limiter.reset()
+        assert limiter.current_interval == 0.5
+
+
+class TestTokenBucketLimiter:
+    """Test TokenBucketLimiter class."""
+
+    @pytest.mark.asyncio
+    async def test_available_tokens_never_sleep(self, clock):
+        """Test that a full bucket serves a burst of capacity requests without waiting."""
+        limiter = TokenBucketLimiter(rate=5, period=1)
+
+        for _ in range(5):
+            await limiter.acquire()
+
+        assert clock.sleeps == []
+        assert limiter.tokens == 0
+
+    @pytest.mark.asyncio
+    async def test_refill_credits_elapsed_time(self, clock):
+        """Test tokens are credited for elapsed time, capped at capacity."""
+        limiter = TokenBucketLimiter(rate=5, period=1)
+        for _ in range(5):
+            await limiter.acquire()
+
+        clock.now += 0.5  # two and a half tokens
+        await limiter.acquire()
+        await limiter.acquire()
+        assert clock.sleeps == []
+
+        clock.now += 100
+        limiter._refill()
+        assert limiter.tokens == 5
+
+    @pytest.mark.asyncio
+    async def test_waiters_reserve_in_order_and_sleep_once(self, clock):
+        """Test that callers on an empty bucket each sleep once, for successive token times."""
+        limiter = TokenBucketLimiter(rate=4, period=1)
+        for _ in range(4):
+            await limiter.acquire()
+
+        await asyncio.gather(*(limiter.acquire() for _ in range(3)))
+
+        assert clock.sleeps == [0.25, 0.5, 0.75]
+        assert limiter.tokens == -3
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_returns_its_token(self):
+        """Test that a waiter cancelled mid-sleep gives its reserved token back."""
+        limiter = TokenBucketLimiter(rate=10, period=1)
+        for _ in range(10):
+            await limiter.acquire()
+
+        waiter = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        assert limiter.tokens < 0
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+        # Only the refill since the burst is left; the cancelled reservation is undone
+        assert limiter.tokens > -0.5
+
+        # Next caller waits one token's worth (0.1s), not two
+        start = time.monotonic()
+        await limiter.acquire()
+        assert time.monotonic() - start < 0.15
+
+
+class TestPerHostRateLimiters:
+    """Test ReconOrchestrator's per-host limiter map."""
+
+    def test_limiters_are_bounded_lru(self, monkeypatch):
+        """Test the least recently used host's bucket is dropped past the cap."""
+        import main
+
+        monkeypatch.setattr(main, 'RATE_LIMITER_CACHE_SIZE', 3)
+        orchestrator = SimpleNamespace(rate_limiters=main.OrderedDict(), args=SimpleNamespace(rate_limit=5))
+        limiter_for = main.ReconOrchestrator._rate_limiter_for.__get__(orchestrator)
+
+        a = limiter_for('https://a.example/x')
+        limiter_for('https://b.example/x')
+        limiter_for('https://c.example/x')
+        assert limiter_for('https://a.example/y') is a  # refreshes a
+        limiter_for('https://d.example/x')
+
+        assert list(orchestrator.rate_limiters) == ['c.example', 'a.example', 'd.example']
@@ -1,7 +1,10 @@
 """Tests for scope_manager module."""
 
 import pytest
-from scope_manager import ScopeManager, create_scope_manager
+from urllib.parse import urlparse
+
+from scope_manager import ScopeManager, create_scope_manager, _fast_hostname
+from utils import normalize_url
 
 
 class TestScopeManager:
@@ -196,6 +199,41 @@ class TestScopeManager:
         # Should still allow others but block the excluded
         assert manager.is_in_scope('https://example.com') is True
         assert manager.is_in_scope('https://blocked.com') is False
+    
+    def test_scheme_relative_url(self):
+        """Test that //host URLs are scoped by their host."""
+        manager = ScopeManager()
+        manager.add_in_scope('*.example.com')
+        
+        assert manager.is_in_scope('//api.example.com/x') is True
+        assert manager.is_in_scope('//other.com/x') is False
+    
+    def test_exclusion_with_embedded_whitespace(self):
+        """Test that tabs/newlines inside a URL can't sidestep an exclusion."""
+        manager = ScopeManager()
+        manager.add_out_of_scope('example.com')
+        
+        assert manager.is_in_scope('https://example.com\t/x') is False
+        assert manager.is_in_scope('https://exa\nmple.com/x') is False
+        assert manager.is_in_scope('https://example.com\r\n') is False
+    
+    @pytest.mark.parametrize('url', [
+        'https://example.com',
+        'HTTPS://API.Example.COM:8443/path?q=1#frag',
+        'https://user:pw@example.com/',
+        'https://[::1]:8080/x',
+        '  https://example.com/  ',
+        '//api.example.com/x',
+        'https://example.com\t/x',
+        'mailto:someone@example.com',
+        '/relative/path',
+        '/redirect?to=https://evil.com/',
+        'https://example.com?next=//evil.com',
+    ])
+    def test_fast_hostname_matches_urlparse(self, url):
+        """Test _fast_hostname against urlparse(normalize_url(url)).hostname."""
+        expected = (urlparse(normalize_url(url)).hostname or '').lower()
+        assert _fast_hostname(url) == expected
 
 
 class TestCreateScopeManager:
@@ -0,0 +1,149 @@
+"""Tests for tor_support module."""
+
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+pytest.importorskip('stem')
+
+from stem import CircStatus, Signal
+from tor_support import TorSupport
+
+
+class _FakeController:
+    """Controller stub that replays CIRC events from a separate thread on NEWNYM, like stem."""
+
+    def __init__(self, existing, events, newnym_wait=0.0):
+        self.existing = existing
+        self.events = events
+        self.newnym_wait = newnym_wait
+        self.listeners = []
+        self.signals = []
+
+    def get_newnym_wait(self):
+        return self.newnym_wait
+
+    def get_circuits(self):
+        return [SimpleNamespace(id=circ_id) for circ_id in self.existing]
+
+    def add_event_listener(self, listener, event_type):
+        self.listeners.append(listener)
+
+    def remove_event_listener(self, listener):
+        self.listeners.remove(listener)
+
+    def signal(self, signal):
+        self.signals.append(signal)
+        listeners = list(self.listeners)
+
+        def emit():
+            for circ_id, status in self.events:
+                for listener in listeners:
+                    listener(SimpleNamespace(id=circ_id, status=status))
+
+        threading.Thread(target=emit).start()
+
+
+def _tor(controller):
+    tor = TorSupport()
+    tor.controller = controller
+    return tor
+
+
+class TestGetNewIp:
+    """Test waiting for a fresh circuit after NEWNYM."""
+
+    @pytest.mark.asyncio
+    async def test_returns_when_new_circuit_is_built(self):
+        """Test a BUILT event for a circuit unknown before NEWNYM ends the wait."""
+        controller = _FakeController(existing=['1'], events=[('7', CircStatus.LAUNCHED), ('7', CircStatus.BUILT)])
+
+        assert await asyncio.wait_for(_tor(controller).get_new_ip(circuit_timeout=5), 1) is True
+        assert controller.signals == [Signal.NEWNYM]
+        assert controller.listeners == []
+
+    @pytest.mark.asyncio
+    async def test_preexisting_circuits_are_not_ready(self, caplog):
+        """Test BUILT events for circuits that existed before NEWNYM are ignored."""
+        controller = _FakeController(existing=['1', '2'], events=[('1', CircStatus.BUILT), ('2', CircStatus.BUILT)])
+
+        assert await _tor(controller).get_new_ip(circuit_timeout=0.1) is True
+        assert 'No new circuit built' in caplog.text
+        assert controller.listeners == []
+
+    @pytest.mark.asyncio
+    async def test_honours_newnym_rate_limit(self, monkeypatch):
+        """Test the NEWNYM wait Tor reports is slept before signalling."""
+        controller = _FakeController(existing=[], events=[('3', CircStatus.BUILT)], newnym_wait=2.5)
+        sleeps = []
+        real_sleep = asyncio.sleep
+
+        async def fake_sleep(seconds):
+            sleeps.append(seconds)
+            assert controller.signals == []
+            await real_sleep(0)
+
+        monkeypatch.setattr('tor_support.asyncio.sleep', fake_sleep)
+
+        assert await _tor(controller).get_new_ip(circuit_timeout=5) is True
+        assert sleeps == [2.5]
+
+    @pytest.mark.asyncio
+    async def test_not_connected(self):
+        """Test get_new_ip without a controller."""
+        assert await TorSupport().get_new_ip() is False
+
+
+
+def _ipify_client(seen):
+    """Stand-in for the SOCKS client that answers ipify with a fixed IP."""
+    def handler(request):
+        seen.append(str(request.url))
+        return httpx.Response(200, json={'ip': '198.51.100.7'})
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+class TestClientPooling:
+    """Test the shared SOCKS client."""
+
+    @pytest.mark.asyncio
+    async def test_ip_checks_share_one_client_until_newnym(self):
+        """Test repeated IP checks reuse the pooled client and NEWNYM drops it."""
+        seen = []
+        tor = _tor(_FakeController(existing=[], events=[('5', CircStatus.BUILT)]))
+        client = tor._http = _ipify_client(seen)
+
+        assert await tor.get_current_ip() == '198.51.100.7'
+        assert await tor.get_current_ip() == '198.51.100.7'
+        assert tor._http is client and len(seen) == 2
+
+        await tor.get_new_ip(circuit_timeout=5)
+
+        assert client.is_closed
+        assert tor._http is None
+
+    @pytest.mark.asyncio
+    async def test_close_closes_client_and_controller(self):
+        """Test close() releases the pooled client and the control connection."""
+        closed = []
+        tor = _tor(SimpleNamespace(close=lambda: closed.append('controller')))
+        client = tor._http = _ipify_client([])
+
+        await tor.close()
+
+        assert client.is_closed and tor._http is None
+        assert closed == ['controller']
+
+    @pytest.mark.asyncio
+    async def test_client_created_once(self):
+        """Test _client() builds the SOCKS client lazily and caches it."""
+        pytest.importorskip('socksio')
+        tor = TorSupport(socks_port=9150)
+
+        client = await tor._client()
+        assert await tor._client() is client
+        await tor.close()
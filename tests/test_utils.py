@@ -0,0 +1,408 @@
+"""Tests for utils module."""
+
+import asyncio
+import json
+import os
+import random
+import re
+import pytest
+from urllib.parse import urljoin, urlparse, urlunparse, parse_qs, urlencode
+
+from utils import (
+    normalize_url, extract_links, _LinkResolver, append_jsonl,
+    format_bytes, human_readable_size, get_base_domain,
+    chunk_iter, chunk_list, sanitize_filename, save_json, load_json,
+    retry_async,
+)
+
+
+def _reference_normalize_url(url):
+    """normalize_url as it was before the fast paths: full parse, parse_qs/urlencode."""
+    try:
+        parsed = urlparse(url.lower().strip())
+        netloc = parsed.netloc
+        if netloc.endswith(":80") and parsed.scheme == "http":
+            netloc = netloc[:-3]
+        elif netloc.endswith(":443") and parsed.scheme == "https":
+            netloc = netloc[:-4]
+        path = parsed.path or "/"
+        if not path.startswith("/"):
+            path = "/" + path
+        path = re.sub(r"/+", "/", path)
+        query = ""
+        if parsed.query:
+            params = parse_qs(parsed.query, keep_blank_values=True)
+            query = urlencode(sorted(params.items()), doseq=True)
+        normalized = urlunparse((parsed.scheme, netloc, path, "", query, ""))
+        if normalized.endswith("/") and len(urlparse(normalized).path) > 1:
+            normalized = normalized.rstrip("/")
+        return normalized
+    except Exception:
+        return url
+
+
+def _random_strings(parts, count, seed):
+    rng = random.Random(seed)
+    return [''.join(rng.choice(parts) for _ in range(rng.randint(1, 7))) for _ in range(count)]
+
+
+class TestNormalizeUrl:
+    """Test normalize_url against the plain urlparse-based reference."""
+
+    @pytest.mark.parametrize('url', [
+        'https://example.com/',
+        'https://example.com/a/b',
+        'https://example.com/a/b/',
+        'https://example.com',
+        'HTTPS://Example.COM/Path',
+        'http://example.com:80/x',
+        'https://example.com:443/x',
+        'https://example.com:8443/x',
+        'https://user@example.com/x',
+        'https://example.com//a///b',
+        'https://example.com/a?b=2&a=1',
+        'https://example.com/a?b=2&a=1&b=1',
+        'https://example.com/a?x&y=1',
+        'https://example.com/a?q=hello%20world&a=',
+        'https://example.com/a#frag',
+        'https://example.com/a;params',
+        '  https://example.com/a  ',
+        'ftp://example.com/file',
+    ])
+    def test_matches_reference(self, url):
+        """Test known shapes, including ones the canonical fast path must not take."""
+        assert normalize_url(url) == _reference_normalize_url(url)
+
+    def test_canonical_url_returned_unchanged(self):
+        """Test that an already-canonical URL comes back as the same string."""
+        url = 'https://api.example.com/v1/users'
+
+        assert normalize_url(url) is url
+
+    def test_random_urls_match_reference(self):
+        """Seeded fuzz: random URL fragments normalize exactly like the reference."""
+        parts = [
+            'http://', 'https://', 'HTTP://', 'example.com', 'a.b', ':80', ':443', ':8080',
+            '/', '//', 'path', 'A', '?', '&', '=', 'k', 'v', '#', ';', '%20', '@', ' ', '.',
+        ]
+        for url in _random_strings(parts, 5000, seed=1234):
+            assert normalize_url(url) == _reference_normalize_url(url), url
+
+
+class TestLinkResolver:
+    """Test _LinkResolver against urljoin."""
+
+    BASES = [
+        'https://example.com/dir/page.html',
+        'https://example.com',
+        'http://example.com:8080/a/b/?q=1#f',
+        'https://user:pw@example.com/x/',
+        'file:///tmp/index.html',
+    ]
+
+    @pytest.mark.parametrize('base', BASES)
+    @pytest.mark.parametrize('href', [
+        '/about',
+        '//cdn.example.com/lib.js',
+        'https://other.com/x?y=1',
+        'http://other.com',
+        'relative/page',
+        '../up',
+        '/a/./b/../c',
+        '?only=query',
+        '#only-fragment',
+        '//',
+        '///triple',
+        'http://',
+        'https:///nohost',
+        '/with space',
+        '/tab\there',
+        '\\\\backslash',
+    ])
+    def test_matches_urljoin(self, base, href):
+        """Test the concatenation fast paths and the urljoin fallback."""
+        assert _LinkResolver(base).resolve(href) == urljoin(base, href)
+
+    def test_random_hrefs_match_urljoin(self):
+        """Seeded fuzz: random hrefs resolve exactly like urljoin."""
+        parts = [
+            '/', '//', 'http://', 'https:', 'a', 'b.c', '.', '..', '?', '#', ':', '@',
+            ' ', '\t', '\\', '[', ']', 'x=1', '%2e',
+        ]
+        for base in self.BASES:
+            resolver = _LinkResolver(base)
+            for href in _random_strings(parts, 3000, seed=base):
+                try:
+                    expected = urljoin(base, href)
+                except ValueError:
+                    continue  # urljoin rejects some bracketed hosts outright
+                assert resolver.resolve(href) == expected, (base, href)
+
+
+class TestExtractLinks:
+    """Test extract_links."""
+
+    def test_extracts_and_normalizes(self, sample_html):
+        """Test absolute links from the sample page."""
+        links = extract_links(sample_html, 'https://example.com/')
+
+        assert sorted(links) == [
+            'https://example.com/page1',
+            'https://example.com/page2',
+            'https://external.com/page',
+        ]
+
+    def test_resolves_relative_and_skips_non_http(self):
+        """Test relative hrefs, iframe sources and skipped schemes."""
+        html = (
+            '<a href="/a">a</a><a href="b">b</a><a href="//cdn.example.com/c">c</a>'
+            '<iframe src="/frame"></iframe><a href="mailto:x@example.com">m</a>'
+            '<a href="javascript:void(0)">j</a><a href="#top">t</a>'
+        )
+        links = extract_links(html, 'https://example.com/dir/page')
+
+        assert sorted(links) == [
+            'https://cdn.example.com/c',
+            'https://example.com/a',
+            'https://example.com/dir/b',
+            'https://example.com/frame',
+        ]
+
+
+class TestAppendJsonl:
+    """Test append_jsonl."""
+
+    @pytest.mark.asyncio
+    async def test_appends_one_line_per_record(self, tmp_path):
+        """Test successive batches accumulate as NDJSON lines."""
+        path = tmp_path / 'results.ndjson'
+
+        await append_jsonl(str(path), [{'url': 'https://example.com/', 'status': 200}])
+        await append_jsonl(str(path), [])
+        await append_jsonl(str(path), [{'url': 'https://example.com/ü'}, {'when': path}])
+
+        lines = path.read_text(encoding='utf-8').splitlines()
+        assert [json.loads(line) for line in lines] == [
+            {'url': 'https://example.com/', 'status': 200},
+            {'url': 'https://example.com/ü'},
+            {'when': str(path)},
+        ]
+
+
+def _reference_format_bytes(bytes_count):
+    """format_bytes as it was before bit_length unit selection."""
+    for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
+        if bytes_count < 1024.0:
+            return f"{bytes_count:.2f} {unit}"
+        bytes_count /= 1024.0
+    return f"{bytes_count:.2f} PB"
+
+
+def _reference_human_readable_size(size_bytes):
+    for unit in ["B", "KB", "MB", "GB"]:
+        if size_bytes < 1024:
+            return f"{size_bytes:.2f} {unit}"
+        size_bytes /= 1024
+    return f"{size_bytes:.2f} TB"
+
+
+class TestFormatSize:
+    """Test format_bytes and human_readable_size."""
+
+    @pytest.mark.parametrize('size, expected', [
+        (0, '0.00 B'),
+        (1023, '1023.00 B'),
+        (1024, '1.00 KB'),
+        (1536, '1.50 KB'),
+        (1024 ** 2 - 1, '1024.00 KB'),
+        (5 * 1024 ** 3, '5.00 GB'),
+        (3 * 1024 ** 5, '3.00 PB'),
+        (2048 * 1024 ** 5, '2048.00 PB'),
+        (-2048, '-2048.00 B'),
+    ])
+    def test_format_bytes(self, size, expected):
+        """Test unit boundaries, the PB cap and negatives."""
+        assert format_bytes(size) == expected
+
+    def test_human_readable_size_caps_at_tb(self):
+        """Test human_readable_size tops out at TB."""
+        assert human_readable_size(3 * 1024 ** 5) == '3072.00 TB'
+
+    def test_random_sizes_match_reference(self):
+        """Seeded fuzz: int and float sizes format exactly like the old loops."""
+        rng = random.Random(87)
+        sizes = [rng.randrange(1 << rng.randint(0, 60)) for _ in range(3000)]
+        sizes += [rng.random() * (1 << rng.randint(0, 60)) for _ in range(3000)]
+        for size in sizes:
+            assert format_bytes(size) == _reference_format_bytes(size), size
+            assert human_readable_size(size) == _reference_human_readable_size(size), size
+
+
+class TestGetBaseDomain:
+    """Test get_base_domain."""
+
+    @pytest.mark.parametrize('domain, expected', [
+        ('example.com', 'example.com'),
+        ('a.b.example.com', 'example.com'),
+        ('localhost', 'localhost'),
+        ('', ''),
+        ('.com', '.com'),
+        ('example.com.', 'com.'),
+        ('a..b', '.b'),
+    ])
+    def test_last_two_labels(self, domain, expected):
+        """Test ordinary hosts and leading, trailing and repeated dots."""
+        assert get_base_domain(domain) == expected
+
+    def test_random_domains_match_split_join(self):
+        """Seeded fuzz: the rfind slice matches the old split/join."""
+        for domain in _random_strings(['a', 'bc', '.', '..', 'x-y'], 3000, seed=816):
+            parts = domain.split('.')
+            assert get_base_domain(domain) == '.'.join(parts[-2:]), domain
+
+
+class TestChunkIter:
+    """Test chunk_iter."""
+
+    @pytest.mark.parametrize('n', [0, 1, 4, 5, 12])
+    def test_matches_chunk_list(self, n):
+        """Test the chunks are the ones chunk_list returns."""
+        items = list(range(n))
+
+        assert list(chunk_iter(items, 4)) == chunk_list(items, 4)
+
+    def test_consumes_generators_lazily(self):
+        """Test only one chunk is pulled from the source at a time."""
+        pulled = []
+
+        def source():
+            for i in range(10):
+                pulled.append(i)
+                yield i
+
+        chunks = chunk_iter(source(), 3)
+
+        assert next(chunks) == [0, 1, 2]
+        assert pulled == [0, 1, 2]
+        assert list(chunks) == [[3, 4, 5], [6, 7, 8], [9]]
+
+
+class TestSanitizeFilename:
+    """Test sanitize_filename."""
+
+    def test_replaces_invalid_characters(self):
+        """Test every reserved character becomes an underscore."""
+        assert sanitize_filename('a<b>c:d"e/f\\g|h?i*j.txt') == 'a_b_c_d_e_f_g_h_i_j.txt'
+
+    def test_non_ascii_passes_through(self):
+        """Test characters past the ASCII table are left unchanged."""
+        assert sanitize_filename('résumé 東京 🙂.pdf') == 'résumé 東京 🙂.pdf'
+
+    def test_truncates_to_200(self):
+        """Test the length limit."""
+        assert sanitize_filename('x' * 250) == 'x' * 200
+
+    def test_random_names_match_regex(self):
+        """Seeded fuzz: the translate table matches the old regex sub."""
+        invalid = re.compile(r'[<>:"/\\|?*]')
+        parts = ['a', '<', '>', ':', '"', '/', '\\', '|', '?', '*', '.', ' ', 'é', '\x7f', '\x80', '\u0100']
+        for name in _random_strings(parts, 3000, seed=823):
+            assert sanitize_filename(name) == invalid.sub('_', name)[:200], name
+
+
+class TestSaveJson:
+    """Test save_json."""
+
+    def test_round_trip_and_no_temp_file_left(self, tmp_path):
+        """Test the written document loads back and the temp file is renamed away."""
+        path = tmp_path / 'out' / 'data.json'
+
+        save_json({'url': 'https://example.com/ü', 'count': 2, 'when': tmp_path}, str(path))
+
+        assert load_json(str(path)) == {'url': 'https://example.com/ü', 'count': 2, 'when': str(tmp_path)}
+        assert os.listdir(path.parent) == ['data.json']
+
+    def test_failed_write_keeps_previous_file(self, tmp_path, monkeypatch):
+        """Test a crash before the rename leaves the old document intact."""
+        path = tmp_path / 'data.json'
+        save_json({'version': 1}, str(path))
+
+        def crash(src, dst):
+            raise OSError('disk full')
+
+        monkeypatch.setattr('utils.os.replace', crash)
+        with pytest.raises(OSError):
+            save_json({'version': 2}, str(path))
+
+        assert load_json(str(path)) == {'version': 1}
+
+
+class TestRetryAsync:
+    """Test retry_async."""
+
+    @pytest.fixture
+    def sleeps(self, monkeypatch):
+        recorded = []
+
+        async def fake_sleep(seconds):
+            recorded.append(seconds)
+
+        monkeypatch.setattr('utils.asyncio.sleep', fake_sleep)
+        return recorded
+
+    @pytest.mark.asyncio
+    async def test_backoff_with_bounded_jitter(self, sleeps):
+        """Test delays grow by backoff with at most +50% jitter, then the last error is raised."""
+        calls = []
+
+        async def failing():
+            calls.append(1)
+            raise ValueError(len(calls))
+
+        with pytest.raises(ValueError, match='4'):
+            await retry_async(failing, max_retries=4, delay=1.0, backoff=2.0)
+
+        assert len(calls) == 4
+        assert len(sleeps) == 3
+        for base, slept in zip([1.0, 2.0, 4.0], sleeps):
+            assert base <= slept <= base * 1.5
+
+    @pytest.mark.asyncio
+    async def test_jitter_varies_between_callers(self, sleeps, monkeypatch):
+        """Test the jitter comes from random(), so callers don't retry in lockstep."""
+        values = iter([0.0, 1.0])
+        monkeypatch.setattr('utils.random.random', lambda: next(values))
+
+        async def flaky():
+            if len(sleeps) < 2:
+                raise ValueError
+            return 'ok'
+
+        assert await retry_async(flaky, max_retries=3, delay=1.0, backoff=1.0) == 'ok'
+        assert sleeps == [1.0, 1.5]
+
+    @pytest.mark.asyncio
+    async def test_cancellation_is_never_retried(self, sleeps):
+        """Test CancelledError propagates at once, even with exceptions=(BaseException,)."""
+        calls = []
+
+        async def cancelled():
+            calls.append(1)
+            raise asyncio.CancelledError
+
+        with pytest.raises(asyncio.CancelledError):
+            await retry_async(cancelled, max_retries=3, exceptions=(BaseException,))
+
+        assert calls == [1]
+        assert sleeps == []
+
+    @pytest.mark.asyncio
+    async def test_unlisted_exceptions_are_not_retried(self, sleeps):
+        """Test only the given exception types are retried."""
+        async def failing():
+            raise KeyError('x')
+
+        with pytest.raises(KeyError):
+            await retry_async(failing, max_retries=3, exceptions=(ValueError,))
+
+        assert sleeps == []
@@ -0,0 +1,87 @@
+"""Tests for vision_analysis module."""
+
+import asyncio
+import pytest
+from vision_analysis import VisionAnalyzer
+
+
+class TestVisionAnalyzer:
+    """Test VisionAnalyzer class."""
+
+    @pytest.mark.asyncio
+    async def test_rejects_path_instead_of_bytes(self):
+        """Test that a file path is rejected instead of raising."""
+        analyzer = VisionAnalyzer('openai', 'key')
+
+        assert await analyzer.analyze_screenshot('/tmp/screenshot.jpg') is None
+
+    @pytest.mark.asyncio
+    async def test_rejects_missing_screenshot(self):
+        """Test that no bytes and no URL returns None instead of raising."""
+        analyzer = VisionAnalyzer('openai', 'key')
+
+        assert await analyzer.analyze_screenshot(None) is None
+
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_requests_share_one_call(self):
+        """Test single-flight: concurrent callers with the same screenshot and prompt."""
+        analyzer = VisionAnalyzer('openai', 'key')
+        calls = []
+
+        async def fake_analyze(screenshot_bytes, prompt, screenshot_url):
+            calls.append(prompt)
+            await asyncio.sleep(0.01)
+            return {'provider': 'openai', 'description': 'a login form'}
+
+        analyzer._analyze = fake_analyze
+        results = await asyncio.gather(*(
+            analyzer.analyze_screenshot(b'\x89PNG same', 'describe') for _ in range(5)
+        ))
+
+        assert len(calls) == 1
+        assert all(r == {'provider': 'openai', 'description': 'a login form'} for r in results)
+        # Every caller gets its own copy
+        results[0]['description'] = 'mutated'
+        assert results[1]['description'] == 'a login form'
+        assert analyzer._inflight == {}
+
+        # Later identical calls come from the LRU; a new prompt is a new call
+        assert (await analyzer.analyze_screenshot(b'\x89PNG same', 'describe'))['description'] == 'a login form'
+        await analyzer.analyze_screenshot(b'\x89PNG same', 'other prompt')
+        assert calls == ['describe', 'other prompt']
+
+    @pytest.mark.asyncio
+    async def test_failures_are_shared_but_not_cached(self):
+        """Test that a failed call is returned to all waiters and retried next time."""
+        analyzer = VisionAnalyzer('openai', 'key')
+        outcomes = [None, {'description': 'ok'}]
+
+        async def fake_analyze(screenshot_bytes, prompt, screenshot_url):
+            await asyncio.sleep(0.01)
+            return outcomes.pop(0)
+
+        analyzer._analyze = fake_analyze
+        first = await asyncio.gather(*(analyzer.analyze_screenshot(b'img') for _ in range(3)))
+
+        assert first == [None, None, None]
+        assert (await analyzer.analyze_screenshot(b'img')) == {'description': 'ok'}
+        assert outcomes == []
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_does_not_cancel_shared_call(self):
+        """Test that cancelling one caller leaves the shared call running for the others."""
+        analyzer = VisionAnalyzer('openai', 'key')
+        started = asyncio.Event()
+
+        async def fake_analyze(screenshot_bytes, prompt, screenshot_url):
+            started.set()
+            await asyncio.sleep(0.02)
+            return {'description': 'done'}
+
+        analyzer._analyze = fake_analyze
+        doomed = asyncio.ensure_future(analyzer.analyze_screenshot(b'img'))
+        survivor = asyncio.ensure_future(analyzer.analyze_screenshot(b'img'))
+        await started.wait()
+        doomed.cancel()
+
+        assert await survivor == {'description': 'done'}
@@ -0,0 +1,153 @@
+"""Tests for webhooks module."""
+
+import asyncio
+import json
+import logging
+import httpx
+import pytest
+from webhooks import WebhookNotifier
+
+
+def _notifier(statuses, sent, **kwargs):
+    """WebhookNotifier whose posts are answered from statuses (last one repeats)."""
+    kwargs.setdefault('retry_delay', 0)
+    notifier = WebhookNotifier(
+        slack_url='https://hooks.slack.test/x',
+        discord_url=kwargs.pop('discord_url', None),
+        **kwargs
+    )
+
+    def handler(request):
+        sent.append((str(request.url), json.loads(request.content)))
+        status = statuses.pop(0) if len(statuses) > 1 else statuses[0]
+        return httpx.Response(status)
+
+    notifier._http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return notifier
+
+
+class TestWebhookRetry:
+    """Test retrying of webhook posts."""
+
+    @pytest.mark.asyncio
+    async def test_retries_server_errors_then_succeeds(self):
+        """Test 429/5xx responses are retried."""
+        sent = []
+        notifier = _notifier([503, 429, 200], sent)
+
+        assert await notifier.notify_slack('hello') is True
+        assert len(sent) == 3
+        await notifier.close()
+
+    @pytest.mark.asyncio
+    async def test_gives_up_after_max_retries(self):
+        """Test a persistently failing endpoint is tried max_retries times."""
+        sent = []
+        notifier = _notifier([500], sent, max_retries=2)
+
+        assert await notifier.notify_slack('hello') is False
+        assert len(sent) == 2
+        await notifier.close()
+
+    @pytest.mark.asyncio
+    async def test_client_errors_are_not_retried(self):
+        """Test 4xx (other than 429) fails immediately."""
+        sent = []
+        notifier = _notifier([404], sent)
+
+        assert await notifier.notify_slack('hello') is False
+        assert len(sent) == 1
+        await notifier.close()
+
+    @pytest.mark.asyncio
+    async def test_notify_all_reports_per_platform(self):
+        """Test notify_all posts to every configured platform."""
+        sent = []
+        notifier = _notifier([200], sent, discord_url='https://discord.test/x')
+
+        # Discord reports success with 204, so a 200 counts as a failure there
+        assert await notifier.notify_all('hello', {'Pages': 3}) == {'slack': True, 'discord': False}
+        assert sorted(url for url, _ in sent) == ['https://discord.test/x', 'https://hooks.slack.test/x']
+        assert (notifier.sent_count, notifier.failed_count) == (1, 1)
+        await notifier.close()
+
+
+class TestErrorBatching:
+    """Test notify_error batching."""
+
+    @pytest.mark.asyncio
+    async def test_batch_size_sends_one_message(self):
+        """Test error_batch_size errors go out as one notification."""
+        sent = []
+        notifier = _notifier([200], sent, error_batch_size=3, error_flush_interval=60)
+
+        await notifier.notify_error('a', {'url': 'https://example.com/a'})
+        await notifier.notify_error('b')
+        assert sent == []
+        await notifier.notify_error('c')
+
+        assert len(sent) == 1
+        assert sent[0][1]['text'] == '❌ 3 errors:\n• a (url=https://example.com/a)\n• b\n• c'
+        await notifier.close()
+        assert len(sent) == 1
+
+    @pytest.mark.asyncio
+    async def test_flush_interval_sends_pending(self):
+        """Test buffered errors are sent once the flush interval passes."""
+        sent = []
+        notifier = _notifier([200], sent, error_batch_size=20, error_flush_interval=0.01)
+
+        await notifier.notify_error('only one')
+        await asyncio.sleep(0.05)
+
+        assert [payload['text'] for _, payload in sent] == ['❌ Error: only one']
+        await notifier.close()
+
+    @pytest.mark.asyncio
+    async def test_close_flushes_buffered_errors(self):
+        """Test close() sends whatever is still buffered and stops the timer."""
+        sent = []
+        notifier = _notifier([200], sent, error_batch_size=20, error_flush_interval=60)
+
+        await notifier.notify_error('x')
+        await notifier.notify_error('y')
+        await notifier.close()
+
+        assert [payload['text'] for _, payload in sent] == ['❌ 2 errors:\n• x\n• y']
+        assert notifier._flush_task is None
+        assert notifier._pending_errors == []
+
+
+class TestWebhookLogging:
+    """Test webhook log levels."""
+
+    @pytest.mark.asyncio
+    async def test_info_only_for_close_summary(self, caplog):
+        """Test per-notification lines are DEBUG and the INFO summary comes once on close()."""
+        sent = []
+        notifier = _notifier([200], sent)
+
+        with caplog.at_level(logging.DEBUG, logger='webhooks'):
+            for _ in range(3):
+                await notifier.notify_all('hello')
+            assert [r for r in caplog.records if r.levelno >= logging.INFO] == []
+            await notifier.close()
+
+        info = [r.getMessage() for r in caplog.records if r.levelno == logging.INFO]
+        assert info == ['Webhook notifications: 3 delivered, 0 failed']
+
+    @pytest.mark.asyncio
+    async def test_notify_all_logs_platform_exceptions(self, caplog):
+        """Test an exception from one platform is logged before it is reported as False."""
+        sent = []
+        notifier = _notifier([204], sent, discord_url='https://discord.test/x')
+
+        async def broken(message, data=None):
+            raise RuntimeError('boom')
+
+        notifier.notify_slack = broken
+        with caplog.at_level(logging.ERROR, logger='webhooks'):
+            assert await notifier.notify_all('hello') == {'slack': False, 'discord': True}
+
+        assert any('Slack' in r.getMessage() and 'boom' in r.getMessage() for r in caplog.records)
+        await notifier.close()
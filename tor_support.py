@@ -2,9 +2,9 @@
 
 import asyncio
 import logging
-from typing import Optional
-from stem import Signal
-from stem.control import Controller
+from typing import Any, Optional
+from stem import CircStatus, Signal
+from stem.control import Controller, EventType
 
 logger = logging.getLogger(__name__)
 
@@ -30,7 +30,26 @@ class TorSupport:
         self.control_port = control_port
         self.password = password
         self.controller: Optional[Controller] = None
+        # Shared SOCKS client for IP checks; dropped on NEWNYM (see get_new_ip)
+        self._http: Optional[Any] = None
         
+    async def _client(self):
+        """Return the pooled httpx client routed through Tor, creating it on first use."""
+        if self._http is None:
+            import httpx
+            
+            self._http = httpx.AsyncClient(
+                proxy=f"socks5://127.0.0.1:{self.socks_port}",
+                timeout=10.0,
+                limits=httpx.Limits(max_keepalive_connections=4)
+            )
+        return self._http
+    
+    async def _close_client(self) -> None:
+        if self._http is not None:
+            client, self._http = self._http, None
+            await client.aclose()
+    
     async def connect(self) -> bool:
         """
         Connect to Tor control port.
@@ -47,10 +66,19 @@ class TorSupport:
             logger.error(f"Failed to connect to Tor: {e}")
             return False
     
-    async def get_new_ip(self) -> bool:
+    async def get_new_ip(self, circuit_timeout: float = 10.0) -> bool:
         """
         Request a new Tor circuit (new IP).
         
+        "Ready" means Tor has reported BUILT for a circuit it did not have
+        before the NEWNYM signal; new streams can then be attached to it.
+        Circuits that were already open or still building beforehand are
+        ignored, since NEWNYM marks them dirty. Tor does not promise that the
+        new circuit uses a different exit, so the exit IP may be unchanged.
+        
+        Args:
+            circuit_timeout: Max seconds to wait for Tor to report a new circuit
+        
         Returns:
             True if successful, False otherwise
         """
@@ -58,12 +86,37 @@ class TorSupport:
             logger.error("Not connected to Tor")
             return False
         
+        # stem delivers events on its own thread; hop back onto the loop to set the event
+        loop = asyncio.get_running_loop()
+        circuit_built = asyncio.Event()
+        
         try:
-            self.controller.signal(Signal.NEWNYM)
-            logger.info("Requested new Tor circuit")
+            # Tor rate-limits NEWNYM and silently defers early signals
+            newnym_wait = self.controller.get_newnym_wait()
+            if newnym_wait > 0:
+                await asyncio.sleep(newnym_wait)
             
-            # Wait for new circuit to be established
-            await asyncio.sleep(5)
+            old_circuits = {circ.id for circ in self.controller.get_circuits()}
+            
+            def on_circuit(event) -> None:
+                if event.status == CircStatus.BUILT and event.id not in old_circuits:
+                    loop.call_soon_threadsafe(circuit_built.set)
+            
+            self.controller.add_event_listener(on_circuit, EventType.CIRC)
+            try:
+                self.controller.signal(Signal.NEWNYM)
+                logger.info("Requested new Tor circuit")
+                
+                # Kept-alive connections stay on the old circuit; start fresh ones
+                await self._close_client()
+                
+                # Return as soon as a new circuit is up instead of a fixed sleep
+                try:
+                    await asyncio.wait_for(circuit_built.wait(), timeout=circuit_timeout)
+                except asyncio.TimeoutError:
+                    logger.warning(f"No new circuit built within {circuit_timeout}s of NEWNYM; continuing")
+            finally:
+                self.controller.remove_event_listener(on_circuit)
             return True
             
         except Exception as e:
@@ -78,16 +131,13 @@ class TorSupport:
             IP address or None
         """
         try:
-            import httpx
+            client = await self._client()
+            response = await client.get('https://api.ipify.org?format=json')
+            data = response.json()
+            ip = data.get('ip')
+            logger.info(f"Current Tor IP: {ip}")
+            return ip
             
-            proxy_url = f"socks5://127.0.0.1:{self.socks_port}"
-            async with httpx.AsyncClient(proxies=proxy_url, timeout=10.0) as client:
-                response = await client.get('https://api.ipify.org?format=json')
-                data = response.json()
-                ip = data.get('ip')
-                logger.info(f"Current Tor IP: {ip}")
-                return ip
-                
         except Exception as e:
             logger.error(f"Failed to get current IP: {e}")
             return None
@@ -111,27 +161,25 @@ class TorSupport:
             True if working, False otherwise
         """
         try:
-            import httpx
+            client = await self._client()
+            # Check Tor check page
+            response = await client.get('https://check.torproject.org/api/ip')
+            data = response.json()
             
-            proxy_url = f"socks5://127.0.0.1:{self.socks_port}"
-            async with httpx.AsyncClient(proxies=proxy_url, timeout=10.0) as client:
-                # Check Tor check page
-                response = await client.get('https://check.torproject.org/api/ip')
-                data = response.json()
+            if data.get('IsTor'):
+                logger.info("Tor connection verified")
+                return True
+            else:
+                logger.warning("Not using Tor")
+                return False
                 
-                if data.get('IsTor'):
-                    logger.info("Tor connection verified")
-                    return True
-                else:
-                    logger.warning("Not using Tor")
-                    return False
-                    
         except Exception as e:
             logger.error(f"Tor verification failed: {e}")
             return False
     
     async def close(self) -> None:
         """Close Tor connection."""
+        await self._close_client()
         if self.controller:
             self.controller.close()
             logger.info("Tor connection closed")
@@ -5,14 +5,65 @@ import os
 import json
 import hashlib
 import logging
+import random
 import asyncio
 from datetime import datetime
-from urllib.parse import urlparse, urljoin, urlunparse, parse_qs, urlencode
-from typing import Optional, Dict, Any, List, Set
+from functools import lru_cache
+from itertools import islice
+from urllib.parse import urlparse, urlsplit, urljoin, urlunparse, parse_qs, urlencode
+from typing import Optional, Dict, Any, Iterable, Iterator, List, Set, Union
 from pathlib import Path
 
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+    HAS_SELECTOLAX = True
+except ImportError:
+    HAS_SELECTOLAX = False
+
+try:
+    import lxml.html
+    from lxml import etree
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
 logger = logging.getLogger(__name__)
 
+# The same URLs are normalized/parsed again at queueing, dedup, scope checks and
+# link extraction; these pure helpers are memoized (use .cache_clear() to bound
+# memory on very long crawls).
+URL_CACHE_SIZE = 1 << 17
+
+# Regex fallback for _raw_links: any href, plus iframe src, in one scan
+_LINK_RE = re.compile(
+    r'<iframe\b[^>]*?\ssrc=["\']([^"\']+)["\']|href=["\']([^"\']+)["\']', re.IGNORECASE
+)
+_MULTI_SLASH_RE = re.compile(r'/{2,}')
+# URLs normalize_url would return unchanged: lowercase http(s), plain host (no
+# port or userinfo), non-empty path without empty segments or a trailing slash
+# (except the root), and no params, query or fragment
+_CANONICAL_URL_RE = re.compile(
+    r"https?://[a-z0-9\-]+(?:\.[a-z0-9\-]+)*/(?:[a-z0-9._~%!$&'()*+,=:@\-]+(?:/[a-z0-9._~%!$&'()*+,=:@\-]+)*)?"
+)
+# Queries made only of key=value pairs that urlencode() would emit unchanged;
+# these can be sorted as raw tokens instead of a parse_qs/urlencode round trip
+_PLAIN_QUERY_RE = re.compile(r'(?:[a-z0-9_.\-~]*=[a-z0-9_.\-~]*)?(?:&+(?:[a-z0-9_.\-~]*=[a-z0-9_.\-~]*)?)*')
+# str.translate table over ASCII: invalid filename characters map to '_'.
+# Lookups past the end raise IndexError, which translate treats as "keep".
+_FILENAME_TABLE = ''.join('_' if c in '<>:"/\\|?*' else c for c in map(chr, range(128)))
+_SKIP_LINK_PREFIXES = ("#", "javascript:", "mailto:", "tel:")
+_SIZE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB', 'PB')
+_DEFAULT_PORT_SUFFIXES = {'http': ':80', 'https': ':443'}
+if HAS_LXML:
+    # Every href plus iframe src, collected by libxml2 in one document walk
+    _LINK_XPATH = etree.XPath('//@href | //iframe/@src', smart_strings=False)
+
 
 def setup_logging(level: str = "INFO") -> logging.Logger:
     """Setup logging configuration."""
@@ -24,6 +75,11 @@ def setup_logging(level: str = "INFO") -> logging.Logger:
     return logging.getLogger("stealth_crawler")
 
 
+def _query_key(token: str) -> str:
+    return token.partition("=")[0]
+
+
+@lru_cache(maxsize=URL_CACHE_SIZE)
 def normalize_url(url: str) -> str:
     """
     Normalize a URL by removing fragments, sorting query parameters, etc.
@@ -32,29 +88,38 @@ def normalize_url(url: str) -> str:
     Returns:
         Normalized URL string
     """
+    if _CANONICAL_URL_RE.fullmatch(url):
+        return url
     try:
         parsed = urlparse(url.lower().strip())
         # Remove default ports
         netloc = parsed.netloc
-        if netloc.endswith(":80") and parsed.scheme == "http":
-            netloc = netloc[:-3]
-        elif netloc.endswith(":443") and parsed.scheme == "https":
-            netloc = netloc[:-4]
+        port_suffix = _DEFAULT_PORT_SUFFIXES.get(parsed.scheme)
+        if port_suffix and netloc.endswith(port_suffix):
+            netloc = netloc[:-len(port_suffix)]
         # Normalize path
         path = parsed.path or "/"
         if not path.startswith("/"):
             path = "/" + path
-        path = re.sub(r"/+", "/", path)  # Remove duplicate slashes
+        if "//" in path:
+            path = _MULTI_SLASH_RE.sub("/", path)  # Remove duplicate slashes
         # Sort query parameters
         query = ""
         if parsed.query:
-            params = parse_qs(parsed.query, keep_blank_values=True)
-            sorted_params = sorted(params.items())
-            query = urlencode(sorted_params, doseq=True)
+            if _PLAIN_QUERY_RE.fullmatch(parsed.query):
+                # Stable sort on the key keeps repeated keys in their original
+                # order, exactly as parse_qs + sorted + urlencode(doseq) would
+                tokens = [t for t in parsed.query.split("&") if t]
+                tokens.sort(key=_query_key)
+                query = "&".join(tokens)
+            else:
+                params = parse_qs(parsed.query, keep_blank_values=True)
+                sorted_params = sorted(params.items())
+                query = urlencode(sorted_params, doseq=True)
         # Remove fragment
         normalized = urlunparse((parsed.scheme, netloc, path, "", query, ""))
         # Remove trailing slash from path (except for root)
-        if normalized.endswith("/") and len(urlparse(normalized).path) > 1:
+        if normalized.endswith("/") and len(path) > 1:
             normalized = normalized.rstrip("/")
         return normalized
     except Exception as e:
@@ -62,6 +127,7 @@ def normalize_url(url: str) -> str:
         return url
 
 
+@lru_cache(maxsize=URL_CACHE_SIZE)
 def get_domain(url: str) -> Optional[str]:
     """
     Extract domain from URL.
@@ -71,15 +137,16 @@ def get_domain(url: str) -> Optional[str]:
         Domain string or None
     """
     try:
-        parsed = urlparse(url)
+        parsed = urlsplit(url)
         return parsed.netloc.lower() if parsed.netloc else None
     except Exception:
         return None
 
 
+@lru_cache(maxsize=URL_CACHE_SIZE)
 def extract_domain(url: str) -> str:
     """Extract domain from URL."""
-    parsed = urlparse(url)
+    parsed = urlsplit(url)
     return parsed.netloc.lower()
 
 
@@ -91,19 +158,17 @@ def get_base_domain(domain: str) -> str:
     Returns:
         Base domain
     """
-    parts = domain.split('.')
-    if len(parts) >= 2:
-        return '.'.join(parts[-2:])
-    return domain
+    # Slice after the second-to-last dot; no intermediate label list
+    i = domain.rfind('.')
+    if i < 0:
+        return domain
+    return domain[domain.rfind('.', 0, i) + 1:]
 
 
+@lru_cache(maxsize=URL_CACHE_SIZE)
 def extract_base_domain(url: str) -> str:
     """Extract base domain (without subdomains)."""
-    domain = extract_domain(url)
-    parts = domain.split(".")
-    if len(parts) >= 2:
-        return ".".join(parts[-2:])
-    return domain
+    return get_base_domain(extract_domain(url))
 
 
 def is_same_domain(url1: str, url2: str) -> bool:
@@ -119,17 +184,36 @@ def is_valid_url(url: str) -> bool:
     Returns:
         True if valid, False otherwise
     """
+    # Nearly every crawled link is http(s)://host...; a host that starts with an
+    # alphanumeric is enough to know urlparse would find scheme and netloc.
+    # Brackets (IPv6 literals) and non-ASCII hosts can make urlparse reject
+    # the URL, so those still take the parse.
+    if url.isascii() and '[' not in url and ']' not in url:
+        if url.startswith('https://'):
+            if url[8:9].isalnum():
+                return True
+        elif url.startswith('http://'):
+            if url[7:8].isalnum():
+                return True
+    return _is_valid_url_parsed(url)
+
+
+@lru_cache(maxsize=URL_CACHE_SIZE)
+def _is_valid_url_parsed(url: str) -> bool:
     try:
-        parsed = urlparse(url)
+        parsed = urlsplit(url)
         return bool(parsed.scheme and parsed.netloc)
     except Exception:
         return False
 
 
+@lru_cache(maxsize=URL_CACHE_SIZE)
 def url_hash(url: str) -> str:
     """Generate hash for URL."""
     normalized = normalize_url(url)
-    return hashlib.md5(normalized.encode()).hexdigest()[:16]
+    # Non-cryptographic id: blake2b with an 8-byte digest gives the same 16 hex
+    # chars as truncated md5 without hashing a full 16-byte digest first
+    return hashlib.blake2b(normalized.encode(), digest_size=8).hexdigest()
 
 
 def hash_url(url: str) -> str:
@@ -143,9 +227,11 @@ def hash_url(url: str) -> str:
     return hashlib.sha256(url.encode()).hexdigest()
 
 
-def content_hash(content: str) -> str:
-    """Generate hash for content."""
-    return hashlib.sha256(content.encode()).hexdigest()[:32]
+def content_hash(content: Union[str, bytes]) -> str:
+    """Generate hash for content (raw bytes are hashed as-is, without a re-encode)."""
+    if isinstance(content, str):
+        content = content.encode()
+    return hashlib.sha256(content).hexdigest()[:32]
 
 
 def resolve_url(base_url: str, relative_url: str) -> str:
@@ -153,35 +239,81 @@ def resolve_url(base_url: str, relative_url: str) -> str:
     return urljoin(base_url, relative_url)
 
 
+def _has_authority(href: str, start: int) -> bool:
+    """True if a non-empty host follows the '//' ending just before start."""
+    return href[start:start + 1] not in ('', '/', '?', '#')
+
+
+class _LinkResolver:
+    """
+    urljoin() specialised to one base URL.
+
+    The base is parsed once; absolute, protocol-relative and root-relative
+    hrefs (the bulk of a page's links) are joined by concatenation, anything
+    else (dot segments, bare relative paths, query/fragment-only) goes
+    through urljoin.
+    """
+
+    __slots__ = ('base_url', 'scheme', 'origin')
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+        parsed = urlparse(base_url)
+        self.scheme = parsed.scheme
+        # Without a network location urljoin semantics get unusual; never fast-path
+        self.origin = f"{parsed.scheme}://{parsed.netloc}" if parsed.scheme in ('http', 'https') and parsed.netloc else None
+
+    def resolve(self, href: str) -> str:
+        # Dot segments, backslashes, embedded whitespace/control characters and
+        # empty query/fragment markers (which urljoin drops) all need urljoin's handling
+        if (self.origin is not None and '/.' not in href and '\\' not in href
+                and href.isprintable() and ' ' not in href
+                and '?#' not in href and not href.endswith(('?', '#'))):
+            if href.startswith('/'):
+                if not href.startswith('//'):
+                    return self.origin + href
+                if _has_authority(href, 2):
+                    return f"{self.scheme}:{href}"
+            elif href.startswith(('http://', 'https://')) and _has_authority(href, href.index('//') + 2):
+                return href
+        return urljoin(self.base_url, href)
+
+
+def _raw_links(html: str) -> List[str]:
+    """Raw href/iframe-src values from HTML: one lexbor (or lxml) parse, or a regex scan without either."""
+    if HAS_SELECTOLAX:
+        tree = LexborHTMLParser(html)
+        links = [node.attributes.get('href') for node in tree.css('[href]')]
+        links += [node.attributes.get('src') for node in tree.css('iframe[src]')]
+        # Valueless attributes (<a href>) come back as None
+        return [link for link in links if link]
+    if HAS_LXML:
+        try:
+            return _LINK_XPATH(lxml.html.fromstring(html))
+        except (etree.ParserError, ValueError) as e:
+            logger.debug(f"lxml could not parse HTML, falling back to regex: {e}")
+    return [src or href for src, href in _LINK_RE.findall(html)]
+
+
 def extract_links(html: str, base_url: str) -> List[str]:
     """
-    Extract all links from HTML content.
+    Extract all links (href attributes and iframe sources) from HTML content.
     Args:
         html: HTML content
         base_url: Base URL for resolving relative links
     Returns:
         List of absolute URLs
     """
+    if not html:
+        return []
     links = set()
-    # Find href attributes
-    href_pattern = re.compile(r'href=["\']([^"\']+)["\']', re.IGNORECASE)
-    for match in href_pattern.finditer(html):
-        url = match.group(1)
-        if url and not url.startswith(("#", "javascript:", "mailto:", "tel:")):
-            resolved = resolve_url(base_url, url)
+    resolve = _LinkResolver(base_url).resolve
+    for url in _raw_links(html):
+        url = url.strip()
+        if url and not url.startswith(_SKIP_LINK_PREFIXES):
+            resolved = resolve(url)
             if is_valid_url(resolved):
                 links.add(normalize_url(resolved))
-    # Optionally extract src from iframes etc. via BeautifulSoup for richer case
-    try:
-        from bs4 import BeautifulSoup
-        soup = BeautifulSoup(html, 'lxml')
-        for tag in soup.find_all('iframe', src=True):
-            src = tag['src']
-            absolute_url = urljoin(base_url, src)
-            if is_valid_url(absolute_url):
-                links.add(normalize_url(absolute_url))
-    except Exception as e:
-        logger.debug(f"BeautifulSoup not available or failed: {e}")
     return list(links)
 
 
@@ -194,7 +326,7 @@ def sanitize_filename(filename: str) -> str:
         Sanitized filename
     """
     # Remove invalid characters
-    sanitized = re.sub(r'[<>:"/\\|?*]', '_', filename)
+    sanitized = filename.translate(_FILENAME_TABLE)
     # Limit length
     if len(sanitized) > 200:
         sanitized = sanitized[:200]
@@ -219,6 +351,14 @@ def parse_content_type(content_type: str) -> Dict[str, str]:
     return result
 
 
+def _format_size(size: Union[int, float], units: tuple) -> str:
+    """Scale size to the largest unit it reaches (capped at units[-1]), 1024-based."""
+    # Each unit is 10 more bits, so the index comes straight from bit_length
+    n = int(size)
+    idx = min((n.bit_length() - 1) // 10, len(units) - 1) if n >= 1024 else 0
+    return f"{size / (1 << 10 * idx):.2f} {units[idx]}"
+
+
 def format_bytes(bytes_count: int) -> str:
     """
     Format bytes into human-readable format.
@@ -227,11 +367,13 @@ def format_bytes(bytes_count: int) -> str:
     Returns:
         Formatted string (e.g., "1.5 MB")
     """
-    for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
-        if bytes_count < 1024.0:
-            return f"{bytes_count:.2f} {unit}"
-        bytes_count /= 1024.0
-    return f"{bytes_count:.2f} PB"
+    return _format_size(bytes_count, _SIZE_UNITS)
+
+
+@lru_cache(maxsize=1024)
+def _path_keys(path: str) -> tuple:
+    """Split a dotted safe_get path once; callers reuse a handful of literal paths."""
+    return tuple(path.split('.'))
 
 
 def safe_get(data: Dict[str, Any], path: str, default: Any = None) -> Any:
@@ -244,9 +386,8 @@ def safe_get(data: Dict[str, Any], path: str, default: Any = None) -> Any:
     Returns:
         Value at path or default
     """
-    keys = path.split('.')
     current = data
-    for key in keys:
+    for key in _path_keys(path):
         if isinstance(current, dict) and key in current:
             current = current[key]
         else:
@@ -262,14 +403,58 @@ def ensure_dir(path: str) -> Path:
 
 
 def save_json(data: Any, filepath: str) -> None:
-    """Save data to JSON file."""
+    """Save data to JSON file atomically (write a temp file, then rename over)."""
     ensure_dir(os.path.dirname(filepath) or ".")
-    with open(filepath, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, default=str, ensure_ascii=False)
+    tmp_path = f"{filepath}.tmp"
+    if HAS_ORJSON:
+        with open(tmp_path, "wb") as f:
+            f.write(orjson.dumps(data, default=str, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_INDENT_2))
+    else:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, default=str, ensure_ascii=False)
+    # A crash mid-write leaves the previous file intact instead of a truncated one
+    os.replace(tmp_path, filepath)
+
+
+def json_dumps(data: Any, indent: bool = False) -> str:
+    """
+    Serialize data to a JSON string, using orjson when it is installed.
+    Args:
+        data: Data to serialize
+        indent: Pretty-print with a two-space indent
+    Returns:
+        JSON string
+    """
+    if HAS_ORJSON:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(data, default=str, option=option).decode("utf-8")
+    return json.dumps(data, indent=2 if indent else None, default=str, ensure_ascii=False)
+
+
+async def append_jsonl(filepath: str, records: List[Any]) -> None:
+    """
+    Append records to an NDJSON file, one JSON document per line, without blocking the event loop.
+    Serialization and the write both run in a worker thread.
+    Args:
+        filepath: Path to the .ndjson/.jsonl file
+        records: Records to append
+    """
+    if not records:
+        return
+
+    def _append() -> None:
+        payload = ("\n".join(json_dumps(r) for r in records) + "\n").encode("utf-8")
+        with open(filepath, "ab") as f:
+            f.write(payload)
+
+    await asyncio.to_thread(_append)
 
 
 def load_json(filepath: str) -> Any:
     """Load data from JSON file."""
+    if HAS_ORJSON:
+        with open(filepath, "rb") as f:
+            return orjson.loads(f.read())
     with open(filepath, "r", encoding="utf-8") as f:
         return json.load(f)
 
@@ -281,11 +466,7 @@ def timestamp() -> str:
 
 def human_readable_size(size_bytes: int) -> str:
     """Convert bytes to human readable format."""
-    for unit in ["B", "KB", "MB", "GB"]:
-        if size_bytes < 1024:
-            return f"{size_bytes:.2f} {unit}"
-        size_bytes /= 1024
-    return f"{size_bytes:.2f} TB"
+    return _format_size(size_bytes, _SIZE_UNITS[:5])
 
 
 def human_readable_duration(seconds: float) -> str:
@@ -307,16 +488,22 @@ async def retry_async(
     backoff: float = 2.0,
     exceptions: tuple = (Exception,)
 ):
-    """Retry async function with exponential backoff."""
+    """Retry async function with exponential backoff and jitter."""
+    if max_retries <= 1:
+        return await func()
     last_exception = None
     current_delay = delay
     for attempt in range(max_retries):
         try:
             return await func()
+        except asyncio.CancelledError:
+            # Never swallow cancellation, even if exceptions includes BaseException
+            raise
         except exceptions as e:
             last_exception = e
             if attempt < max_retries - 1:
-                await asyncio.sleep(current_delay)
+                # Up to +50% jitter so concurrent callers don't retry in lockstep
+                await asyncio.sleep(current_delay * (1 + random.random() * 0.5))
                 current_delay *= backoff
     raise last_exception
 
@@ -326,17 +513,30 @@ def chunk_list(lst: List[Any], chunk_size: int) -> List[List[Any]]:
     return [lst[i:i + chunk_size] for i in range(0, len(lst), chunk_size)]
 
 
+def chunk_iter(items: Iterable[Any], chunk_size: int) -> Iterator[List[Any]]:
+    """Yield successive chunks of any iterable, holding only one chunk at a time."""
+    it = iter(items)
+    while True:
+        chunk = list(islice(it, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
 def flatten_list(nested: List[List[Any]]) -> List[Any]:
     """Flatten nested list."""
     return [item for sublist in nested for item in sublist]
 
 
 def deduplicate(items: List[Any], key=None) -> List[Any]:
-    """Remove duplicates while preserving order."""
+    """Remove duplicates while preserving order (first occurrence wins)."""
+    if key is None:
+        # dicts keep insertion order; the whole dedup runs in C
+        return list(dict.fromkeys(items))
     seen = set()
     result = []
     for item in items:
-        k = key(item) if key else item
+        k = key(item)
         if k not in seen:
             seen.add(k)
             result.append(item)
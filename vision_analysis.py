@@ -1,12 +1,81 @@
 """AI-powered vision analysis for StealthCrawler v17."""
 
 import asyncio
+import binascii
+import copy
+import hashlib
+import io
 import logging
-from typing import Optional, Dict, Any
-import base64
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple
+
+try:
+    import pybase64
+    HAS_PYBASE64 = True
+except ImportError:
+    HAS_PYBASE64 = False
+
+try:
+    from PIL import Image
+    HAS_PIL = True
+except ImportError:
+    HAS_PIL = False
 
 logger = logging.getLogger(__name__)
 
+# Analyses kept per VisionAnalyzer; a repeat (screenshot, prompt) skips the paid API call
+VISION_CACHE_SIZE = 256
+
+# Providers downscale large images anyway; sending more pixels only costs upload and tokens
+DOWNSCALE_MAX_DIM = 1024
+DOWNSCALE_JPEG_QUALITY = 80
+
+# detect_elements prompt for the default element types, built once
+_DEFAULT_ELEMENT_TYPES = ['buttons', 'forms', 'links', 'images']
+_DEFAULT_ELEMENT_PROMPT = f"Identify and list all {', '.join(_DEFAULT_ELEMENT_TYPES)} visible in this screenshot."
+
+
+def _encode_image(image_bytes: bytes) -> str:
+    """Base64-encode image bytes for a provider payload (one C pass, no line breaks)."""
+    if HAS_PYBASE64:
+        # SIMD (AVX2/NEON) encoder; same output as binascii
+        return pybase64.b64encode_as_string(image_bytes)
+    return binascii.b2a_base64(image_bytes, newline=False).decode('ascii')
+
+
+def _sniff_media_type(image_bytes: bytes) -> str:
+    """Media type from the image's magic bytes (PNG unless recognised otherwise)."""
+    if image_bytes.startswith(b'\xff\xd8\xff'):
+        return 'image/jpeg'
+    if image_bytes[:4] == b'RIFF' and image_bytes[8:12] == b'WEBP':
+        return 'image/webp'
+    return 'image/png'
+
+
+def _prepare_image(image_bytes: bytes, max_dim: Optional[int]) -> Tuple[bytes, str]:
+    """
+    Shrink an image to fit within max_dim x max_dim, re-encoded as JPEG.
+    
+    Images that already fit (or can't be decoded, or when Pillow is missing)
+    are returned unchanged with their sniffed media type.
+    """
+    media_type = _sniff_media_type(image_bytes)
+    if max_dim is None or not HAS_PIL:
+        return image_bytes, media_type
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as img:
+            if max(img.size) <= max_dim:
+                return image_bytes, media_type
+            img.thumbnail((max_dim, max_dim), Image.LANCZOS)
+            if img.mode not in ('RGB', 'L'):
+                img = img.convert('RGB')  # JPEG has no alpha channel
+            out = io.BytesIO()
+            img.save(out, format='JPEG', quality=DOWNSCALE_JPEG_QUALITY)
+    except Exception as e:
+        logger.debug(f"Could not downscale screenshot, sending as is: {e}")
+        return image_bytes, media_type
+    return out.getvalue(), 'image/jpeg'
+
 
 class VisionAnalyzer:
     """
@@ -22,22 +91,64 @@ class VisionAnalyzer:
     def __init__(
         self,
         provider: str = 'openai',
-        api_key: Optional[str] = None
+        api_key: Optional[str] = None,
+        *,
+        cache_size: int = VISION_CACHE_SIZE,
+        max_image_dim: Optional[int] = DOWNSCALE_MAX_DIM
     ):
         self.provider = provider
         self.api_key = api_key
+        # Screenshots larger than this (px, either side) are downscaled before upload; None disables
+        self.max_image_dim = max_image_dim
+        # (image digest or URL, prompt) -> result, least recently used first; 0 disables
+        self.cache_size = cache_size
+        self._cache: 'OrderedDict[Tuple[Any, str], Dict[str, Any]]' = OrderedDict()
+        # Same key -> the analysis task already running for it (single-flight)
+        self._inflight: Dict[Tuple[Any, str], 'asyncio.Task[Optional[Dict[str, Any]]]'] = {}
+        # SDK clients built on first use and kept, so their connection pools stay warm
+        self._openai: Optional[Any] = None
+        self._anthropic: Optional[Any] = None
+    
+    async def close(self) -> None:
+        """Close the provider SDK clients."""
+        for attr in ('_openai', '_anthropic'):
+            client = getattr(self, attr)
+            if client is not None:
+                setattr(self, attr, None)
+                await client.close()
+    
+    @staticmethod
+    def _cache_key(
+        screenshot_bytes: Optional[bytes],
+        prompt: str,
+        screenshot_url: Optional[str]
+    ) -> Tuple[Any, str]:
+        image = screenshot_url or hashlib.blake2b(screenshot_bytes, digest_size=16).digest()
+        return (image, prompt)
+    
+    def _remember(self, key: Tuple[Any, str], result: Dict[str, Any]) -> None:
+        if self.cache_size <= 0:
+            return
+        # Stored as a private copy so callers can mutate what they get back
+        self._cache[key] = copy.deepcopy(result)
+        self._cache.move_to_end(key)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
         
     async def analyze_screenshot(
         self,
-        screenshot_bytes: bytes,
-        prompt: str = "Describe what you see in this screenshot."
+        screenshot_bytes: Optional[bytes],
+        prompt: str = "Describe what you see in this screenshot.",
+        screenshot_url: Optional[str] = None
     ) -> Optional[Dict[str, Any]]:
         """
         Analyze a screenshot using AI vision.
         
         Args:
-            screenshot_bytes: Screenshot image bytes
+            screenshot_bytes: Screenshot image bytes (may be None when screenshot_url is given)
             prompt: Analysis prompt
+            screenshot_url: Publicly reachable image URL; sent by reference instead
+                of base64-encoding the bytes into the request
             
         Returns:
             Analysis results or None
@@ -46,11 +157,57 @@ class VisionAnalyzer:
             logger.warning("No API key configured for vision analysis")
             return None
         
+        if not screenshot_url and not isinstance(screenshot_bytes, (bytes, bytearray, memoryview)):
+            logger.error(f"Vision analysis needs screenshot bytes or a URL, got {type(screenshot_bytes).__name__}")
+            return None
+        
+        key = self._cache_key(screenshot_bytes, prompt, screenshot_url)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            return copy.deepcopy(cached)
+        
+        # Concurrent callers with the same screenshot and prompt share one API call
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._analyze_and_remember(key, screenshot_bytes, prompt, screenshot_url))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # shield: a cancelled waiter must not cancel the call the others are waiting on
+        result = await asyncio.shield(task)
+        return copy.deepcopy(result) if result is not None else None
+    
+    async def _analyze_and_remember(
+        self,
+        key: Tuple[Any, str],
+        screenshot_bytes: Optional[bytes],
+        prompt: str,
+        screenshot_url: Optional[str]
+    ) -> Optional[Dict[str, Any]]:
+        result = await self._analyze(screenshot_bytes, prompt, screenshot_url)
+        # Failures are not cached: they are usually transient (rate limits, timeouts)
+        if result is not None:
+            self._remember(key, result)
+        return result
+    
+    async def _analyze(
+        self,
+        screenshot_bytes: Optional[bytes],
+        prompt: str,
+        screenshot_url: Optional[str]
+    ) -> Optional[Dict[str, Any]]:
+        """Run one analysis against the configured provider."""
         try:
+            media_type = 'image/png'
+            if not screenshot_url:
+                # Decoding/resizing is CPU-bound; keep it off the event loop
+                screenshot_bytes, media_type = await asyncio.to_thread(
+                    _prepare_image, screenshot_bytes, self.max_image_dim
+                )
             if self.provider == 'openai':
-                return await self._analyze_with_openai(screenshot_bytes, prompt)
+                return await self._analyze_with_openai(screenshot_bytes, prompt, screenshot_url, media_type)
             elif self.provider == 'anthropic':
-                return await self._analyze_with_anthropic(screenshot_bytes, prompt)
+                return await self._analyze_with_anthropic(screenshot_bytes, prompt, screenshot_url, media_type)
             else:
                 logger.error(f"Unknown provider: {self.provider}")
                 return None
@@ -61,17 +218,25 @@ class VisionAnalyzer:
     
     async def _analyze_with_openai(
         self,
-        screenshot_bytes: bytes,
-        prompt: str
+        screenshot_bytes: Optional[bytes],
+        prompt: str,
+        screenshot_url: Optional[str] = None,
+        media_type: str = 'image/png'
     ) -> Optional[Dict[str, Any]]:
         """Analyze using OpenAI GPT-4 Vision."""
         try:
-            from openai import AsyncOpenAI
-            
-            client = AsyncOpenAI(api_key=self.api_key)
+            if self._openai is None:
+                from openai import AsyncOpenAI
+                
+                self._openai = AsyncOpenAI(api_key=self.api_key)
+            client = self._openai
             
-            # Encode image to base64
-            base64_image = base64.b64encode(screenshot_bytes).decode('utf-8')
+            # A URL is passed by reference; otherwise inline the image as a base64 data URL
+            if screenshot_url:
+                image_url = screenshot_url
+            else:
+                image_data = await asyncio.to_thread(_encode_image, screenshot_bytes)
+                image_url = f"data:{media_type};base64,{image_data}"
             
             response = await client.chat.completions.create(
                 model="gpt-4-vision-preview",
@@ -83,7 +248,7 @@ class VisionAnalyzer:
                             {
                                 "type": "image_url",
                                 "image_url": {
-                                    "url": f"data:image/png;base64,{base64_image}"
+                                    "url": image_url
                                 }
                             }
                         ]
@@ -103,7 +268,7 @@ class VisionAnalyzer:
                 }
             }
             
-            logger.info("OpenAI vision analysis completed")
+            logger.debug("OpenAI vision analysis completed")
             return result
             
         except Exception as e:
@@ -112,17 +277,28 @@ class VisionAnalyzer:
     
     async def _analyze_with_anthropic(
         self,
-        screenshot_bytes: bytes,
-        prompt: str
+        screenshot_bytes: Optional[bytes],
+        prompt: str,
+        screenshot_url: Optional[str] = None,
+        media_type: str = 'image/png'
     ) -> Optional[Dict[str, Any]]:
         """Analyze using Anthropic Claude."""
         try:
-            from anthropic import AsyncAnthropic
-            
-            client = AsyncAnthropic(api_key=self.api_key)
+            if self._anthropic is None:
+                from anthropic import AsyncAnthropic
+                
+                self._anthropic = AsyncAnthropic(api_key=self.api_key)
+            client = self._anthropic
             
-            # Encode image to base64
-            base64_image = base64.b64encode(screenshot_bytes).decode('utf-8')
+            # A URL is passed by reference; otherwise inline the image as base64
+            if screenshot_url:
+                image_source = {"type": "url", "url": screenshot_url}
+            else:
+                image_source = {
+                    "type": "base64",
+                    "media_type": media_type,
+                    "data": await asyncio.to_thread(_encode_image, screenshot_bytes)
+                }
             
             response = await client.messages.create(
                 model="claude-3-opus-20240229",
@@ -133,11 +309,7 @@ class VisionAnalyzer:
                         "content": [
                             {
                                 "type": "image",
-                                "source": {
-                                    "type": "base64",
-                                    "media_type": "image/png",
-                                    "data": base64_image
-                                }
+                                "source": image_source
                             },
                             {
                                 "type": "text",
@@ -158,7 +330,7 @@ class VisionAnalyzer:
                 }
             }
             
-            logger.info("Anthropic vision analysis completed")
+            logger.debug("Anthropic vision analysis completed")
             return result
             
         except Exception as e:
@@ -180,10 +352,10 @@ class VisionAnalyzer:
         Returns:
             Detected elements or None
         """
-        if element_types is None:
-            element_types = ['buttons', 'forms', 'links', 'images']
-        
-        prompt = f"Identify and list all {', '.join(element_types)} visible in this screenshot."
+        if element_types is None or element_types == _DEFAULT_ELEMENT_TYPES:
+            prompt = _DEFAULT_ELEMENT_PROMPT
+        else:
+            prompt = f"Identify and list all {', '.join(element_types)} visible in this screenshot."
         
         return await self.analyze_screenshot(screenshot_bytes, prompt)
     
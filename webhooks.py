@@ -2,11 +2,39 @@
 
 import asyncio
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 import httpx
 
+from utils import retry_async
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+try:
+    import h2  # noqa: F401  (httpx's HTTP/2 support)
+    HAS_H2 = True
+except ImportError:
+    HAS_H2 = False
+
 logger = logging.getLogger(__name__)
 
+# Transient failures worth another attempt; anything else is final
+_RETRYABLE_ERRORS = (httpx.HTTPStatusError, httpx.TransportError)
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Fixed MessageCard fields; notify_teams only adds text and sections
+_TEAMS_CARD = {
+    "@type": "MessageCard",
+    "@context": "https://schema.org/extensions",
+    "summary": "StealthCrawler Notification",
+    "themeColor": "0078D7",
+    "title": "StealthCrawler v17"
+}
+
 
 class WebhookNotifier:
     """
@@ -23,11 +51,67 @@ class WebhookNotifier:
         self,
         slack_url: Optional[str] = None,
         discord_url: Optional[str] = None,
-        teams_url: Optional[str] = None
+        teams_url: Optional[str] = None,
+        *,
+        max_retries: int = 3,
+        retry_delay: float = 1.0,
+        error_batch_size: int = 20,
+        error_flush_interval: float = 1.0
     ):
         self.slack_url = slack_url
         self.discord_url = discord_url
         self.teams_url = teams_url
+        # Attempts per post (1 disables retrying) and the first backoff delay in seconds
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        # One pooled client for all platforms so repeat notifications reuse TLS connections
+        self._http: Optional[httpx.AsyncClient] = None
+        # notify_error buffers here; one message goes out per batch_size errors or flush_interval seconds
+        self.error_batch_size = error_batch_size
+        self.error_flush_interval = error_flush_interval
+        self._pending_errors: List[Tuple[str, Optional[Dict[str, Any]]]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        # Per-platform delivery totals, summarised at INFO once on close()
+        self.sent_count = 0
+        self.failed_count = 0
+    
+    def _client(self) -> httpx.AsyncClient:
+        """Return the shared httpx client, creating it on first use."""
+        if self._http is None:
+            # HTTP/2 lets concurrent posts to one platform share a single connection
+            self._http = httpx.AsyncClient(http2=HAS_H2)
+        return self._http
+    
+    async def _post(self, url: str, payload: Dict[str, Any]) -> httpx.Response:
+        """POST a JSON payload, retrying 429/5xx and transport errors with backoff and jitter."""
+        if HAS_ORJSON:
+            # Serialize once (orjson emits the same compact UTF-8 JSON as httpx's json=)
+            request_kwargs = {"content": orjson.dumps(payload), "headers": _JSON_HEADERS}
+        else:
+            request_kwargs = {"json": payload}
+        
+        async def attempt() -> httpx.Response:
+            response = await self._client().post(url, **request_kwargs)
+            if response.status_code == 429 or response.status_code >= 500:
+                response.raise_for_status()
+            return response
+        
+        return await retry_async(
+            attempt,
+            max_retries=self.max_retries,
+            delay=self.retry_delay,
+            exceptions=_RETRYABLE_ERRORS
+        )
+    
+    async def close(self) -> None:
+        """Send any buffered errors, log the delivery summary, then close the shared httpx client."""
+        await self.flush()
+        if self.sent_count or self.failed_count:
+            logger.info(f"Webhook notifications: {self.sent_count} delivered, {self.failed_count} failed")
+            self.sent_count = self.failed_count = 0
+        if self._http is not None:
+            client, self._http = self._http, None
+            await client.aclose()
         
     async def notify_slack(self, message: str, data: Optional[Dict[str, Any]] = None) -> bool:
         """
@@ -59,27 +143,22 @@ class WebhookNotifier:
             
             # Add fields if data provided
             if data:
-                fields = []
-                for key, value in data.items():
-                    fields.append({
-                        "type": "mrkdwn",
-                        "text": f"*{key}:*\n{value}"
-                    })
-                
                 payload["blocks"].append({
                     "type": "section",
-                    "fields": fields
+                    "fields": [
+                        {"type": "mrkdwn", "text": f"*{key}:*\n{value}"}
+                        for key, value in data.items()
+                    ]
                 })
             
-            async with httpx.AsyncClient() as client:
-                response = await client.post(self.slack_url, json=payload)
-                
-                if response.status_code == 200:
-                    logger.info("Slack notification sent")
-                    return True
-                else:
-                    logger.error(f"Slack notification failed: {response.status_code}")
-                    return False
+            response = await self._post(self.slack_url, payload)
+            
+            if response.status_code == 200:
+                logger.debug("Slack notification sent")
+                return True
+            else:
+                logger.error(f"Slack notification failed: {response.status_code}")
+                return False
                     
         except Exception as e:
             logger.error(f"Slack notification error: {e}")
@@ -107,29 +186,22 @@ class WebhookNotifier:
             
             # Add embed if data provided
             if data:
-                embed = {
+                payload["embeds"].append({
                     "title": "Crawl Details",
-                    "fields": []
-                }
-                
-                for key, value in data.items():
-                    embed["fields"].append({
-                        "name": key,
-                        "value": str(value),
-                        "inline": True
-                    })
-                
-                payload["embeds"].append(embed)
+                    "fields": [
+                        {"name": key, "value": str(value), "inline": True}
+                        for key, value in data.items()
+                    ]
+                })
             
-            async with httpx.AsyncClient() as client:
-                response = await client.post(self.discord_url, json=payload)
-                
-                if response.status_code == 204:
-                    logger.info("Discord notification sent")
-                    return True
-                else:
-                    logger.error(f"Discord notification failed: {response.status_code}")
-                    return False
+            response = await self._post(self.discord_url, payload)
+            
+            if response.status_code == 204:
+                logger.debug("Discord notification sent")
+                return True
+            else:
+                logger.error(f"Discord notification failed: {response.status_code}")
+                return False
                     
         except Exception as e:
             logger.error(f"Discord notification error: {e}")
@@ -150,38 +222,25 @@ class WebhookNotifier:
             return False
         
         try:
-            payload = {
-                "@type": "MessageCard",
-                "@context": "https://schema.org/extensions",
-                "summary": "StealthCrawler Notification",
-                "themeColor": "0078D7",
-                "title": "StealthCrawler v17",
-                "text": message,
-                "sections": []
-            }
+            payload = {**_TEAMS_CARD, "text": message, "sections": []}
             
             # Add facts if data provided
             if data:
-                facts = []
-                for key, value in data.items():
-                    facts.append({
-                        "name": key,
-                        "value": str(value)
-                    })
-                
                 payload["sections"].append({
-                    "facts": facts
+                    "facts": [
+                        {"name": key, "value": str(value)}
+                        for key, value in data.items()
+                    ]
                 })
             
-            async with httpx.AsyncClient() as client:
-                response = await client.post(self.teams_url, json=payload)
-                
-                if response.status_code == 200:
-                    logger.info("Teams notification sent")
-                    return True
-                else:
-                    logger.error(f"Teams notification failed: {response.status_code}")
-                    return False
+            response = await self._post(self.teams_url, payload)
+            
+            if response.status_code == 200:
+                logger.debug("Teams notification sent")
+                return True
+            else:
+                logger.error(f"Teams notification failed: {response.status_code}")
+                return False
                     
         except Exception as e:
             logger.error(f"Teams notification error: {e}")
@@ -198,17 +257,29 @@ class WebhookNotifier:
         Returns:
             Dictionary with results for each platform
         """
-        results = {}
+        pending = {}
         
         if self.slack_url:
-            results['slack'] = await self.notify_slack(message, data)
+            pending['slack'] = self.notify_slack(message, data)
         
         if self.discord_url:
-            results['discord'] = await self.notify_discord(message, data)
+            pending['discord'] = self.notify_discord(message, data)
         
         if self.teams_url:
-            results['teams'] = await self.notify_teams(message, data)
+            pending['teams'] = self.notify_teams(message, data)
         
+        # Post to every platform at once: total latency is the slowest webhook, not the sum
+        values = await asyncio.gather(*pending.values(), return_exceptions=True)
+        results = {}
+        for platform, value in zip(pending, values):
+            if isinstance(value, BaseException):
+                logger.error(f"{platform.capitalize()} notification error: {value!r}")
+                value = False
+            results[platform] = value
+        delivered = sum(results.values())
+        self.sent_count += delivered
+        self.failed_count += len(results) - delivered
+        logger.debug(f"Webhook notification sent to {delivered}/{len(results)} platforms")
         return results
     
     async def notify_crawl_started(self, start_urls: list, max_depth: int) -> None:
@@ -234,6 +305,47 @@ class WebhookNotifier:
         await self.notify_all(message, data)
     
     async def notify_error(self, error_message: str, context: Optional[Dict[str, Any]] = None) -> None:
-        """Notify about an error."""
-        message = f"❌ Error: {error_message}"
-        await self.notify_all(message, context)
+        """
+        Notify about an error.
+        
+        Errors are buffered and sent as one message per error_batch_size
+        errors or error_flush_interval seconds, so a run of failing URLs
+        doesn't trip the platforms' rate limits. Call flush() (or close())
+        to send whatever is still buffered.
+        """
+        self._pending_errors.append((error_message, context))
+        if len(self._pending_errors) >= self.error_batch_size:
+            await self.flush()
+        elif self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_later())
+    
+    async def _flush_later(self) -> None:
+        """Send the error batch once error_flush_interval has passed."""
+        await asyncio.sleep(self.error_flush_interval)
+        self._flush_task = None
+        await self._send_errors()
+    
+    async def flush(self) -> None:
+        """Send buffered errors now."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self._send_errors()
+    
+    async def _send_errors(self) -> None:
+        """Post the buffered errors as a single notification."""
+        batch, self._pending_errors = self._pending_errors, []
+        if not batch:
+            return
+        if len(batch) == 1:
+            error_message, context = batch[0]
+            await self.notify_all(f"❌ Error: {error_message}", context)
+            return
+        lines = [f"❌ {len(batch)} errors:"]
+        for error_message, context in batch:
+            if context:
+                details = ", ".join(f"{key}={value}" for key, value in context.items())
+                lines.append(f"• {error_message} ({details})")
+            else:
+                lines.append(f"• {error_message}")
+        await self.notify_all("\n".join(lines))